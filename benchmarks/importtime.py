@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Checks that importing pypoints stays fast and does no file I/O.
+It runs ``python -X importtime -c "import pypoints"`` in an empty directory and fails
+if the import takes longer than the budget or leaves any file behind.
+
+Usage: ``python benchmarks/importtime.py [budget in ms]``
+"""
+
+import os
+import py_compile
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET = 10.0
+RUNS = 5
+
+def measure(cwd):
+    """Returns the cumulative import time of pypoints in milliseconds"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import pypoints"], cwd=cwd, env=env, stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+    for line in out.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == "pypoints":
+            return int(parts[1]) / 1000
+    raise RuntimeError("pypoints not found in -X importtime output")
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET
+    py_compile.compile(os.path.join(ROOT, "pypoints.py"))
+    with tempfile.TemporaryDirectory() as cwd:
+        best = min(measure(cwd) for i in range(RUNS))
+        created = os.listdir(cwd)
+    print("import pypoints: %.2f ms (budget %.2f ms)" % (best, budget))
+    if created:
+        print("FAIL: import created " + ", ".join(created))
+        return 1
+    if best > budget:
+        print("FAIL: import is over budget")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
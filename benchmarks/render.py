@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Render benchmarks for PyPoints, run on a :class:`pypoints.HeadlessWindow` so no terminal is needed.
+Every scene runs in its own process, so the registries and memory numbers of one scene do not leak into the next.
+
+For each scene it reports the build time, the memory used by the built scene, the frames per second,
+the curses calls per frame and the memory blocks left allocated per frame.
+
+Usage::
+
+    python benchmarks/render.py                      # run every scene
+    python benchmarks/render.py points text          # run some scenes
+    python benchmarks/render.py --save base.json     # save the results
+    python benchmarks/render.py --check base.json    # fail if calls/frame or memory got worse
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from array import array
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pypoints as pp
+
+COLS = 200
+LINES = 60
+FRAMES = 200
+
+def font():
+    return pp.Font(pp.Color(pp.white, pp.black))
+
+def scene_points(win):
+    """2000 random points, 50 of them moved every frame"""
+    rand = random.Random(1)
+    points = [pp.Point("*", rand.randrange(COLS), rand.randrange(LINES), 0) for i in range(2000)]
+
+    def frame(num):
+        for point in rand.sample(points, 50):
+            point.x = rand.randrange(COLS)
+            point.y = rand.randrange(LINES)
+        pp.refresh(win)
+    return frame
+
+def scene_grid(win):
+    """A full-screen grid of HLines and VLines, one line rebuilt every frame"""
+    lines = [pp.HLine(0, COLS, y, "-", 0) for y in range(0, LINES, 2)]
+    lines += [pp.VLine(0, LINES, x, "|", 0) for x in range(0, COLS, 4)]
+
+    def frame(num):
+        line = lines[num % len(lines)]
+        line.remove()
+        line.char = "=" if line.char == "-" else "-"
+        line.build()
+        pp.refresh(win)
+    return frame
+
+def scene_text(win):
+    """A screen of Text rows, five of them changed every frame"""
+    style = font()
+    rows = [pp.Text(0, y, ("row %d " % y) * 20, 0, style) for y in range(LINES)]
+
+    def frame(num):
+        for i in range(5):
+            row = rows[(num * 5 + i) % LINES]
+            row.set_text(("row %d frame %d " % (row.y, num)) * 12)
+        pp.refresh(win)
+    return frame
+
+def scene_menu(win):
+    """A MenuBox with 40 options, navigated with scripted arrow keys"""
+    menu = pp.MenuBox(2, 2, ["option %d" % i for i in range(40)], 0, font())
+    win.feed(["KEY_DOWN"] * FRAMES + ["\n"])
+    return lambda num: menu.capture(win)
+
+def scene_typing(win):
+    """A SingleLineTextBox that gets a paste almost as wide as the screen"""
+    box = pp.SingleLineTextBox(0, 0, 0, font(), "> ")
+    win.feed(list("abcdefghij" * (COLS // 10 - 1)) + ["\n"])
+    return lambda num: box.capture(win)
+
+def scene_layers(win):
+    """A full-screen static background layer under a progress bar layer that grows every frame"""
+    style = font()
+    screen = pp.Compositor()
+    screen.layer(1)
+    screen.layer(2, 20, LINES // 2, COLS - 40, 1)
+    for y in range(LINES):
+        pp.Text(0, y, ("background %d " % y) * 20, 1, style)
+    bar = pp.Text(0, 0, "", 2, style)
+    screen.render(win)
+
+    def frame(num):
+        bar.set_text("#" * (num % (COLS - 40)))
+        screen.render(win)
+    return frame
+
+def scene_heatmap(win):
+    """A full-screen Canvas heatmap that is replaced every frame"""
+    styles = [pp.Font(pp.Color(color, pp.black)).regid for color in (pp.blue, pp.cyan, pp.green, pp.yellow, pp.red)]
+    canvas = pp.Canvas(0, 0, COLS, LINES, 0)
+    rand = random.Random(1)
+    frames = []
+    for i in range(10):
+        heat = [rand.randrange(5) for cell in range(COLS * LINES)]
+        frames.append((array("I", (ord(" .:*#"[i]) for i in heat)), array("i", (styles[i] for i in heat))))
+
+    def frame(num):
+        chars, fonts = frames[num % len(frames)]
+        canvas.blit(chars, font=fonts)
+        pp.refresh(win)
+    return frame
+
+def scene_log(win):
+    """A full-screen LogView that gets 20 new lines every frame"""
+    view = pp.LogView(0, 0, COLS, LINES, 0, font(), max_lines=1000)
+
+    def frame(num):
+        for i in range(20):
+            view.append("frame %d line %d: service is still running" % (num, i))
+        pp.refresh(win)
+    return frame
+
+SCENES = {
+    "points": (scene_points, FRAMES),
+    "grid": (scene_grid, FRAMES),
+    "text": (scene_text, FRAMES),
+    "menu": (scene_menu, 1),
+    "typing": (scene_typing, 1),
+    "layers": (scene_layers, FRAMES),
+    "heatmap": (scene_heatmap, FRAMES),
+    "log": (scene_log, FRAMES),
+}
+
+def measure(name):
+    """Runs scene ``name`` and returns its results"""
+    pp.use_headless()
+    pp.set_log(None)
+    setup, count = SCENES[name]
+    win = pp.HeadlessWindow(LINES, COLS)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    frame = setup(win)
+    pp.refresh(win)
+    build = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    calls = win.calls
+    frames = win.frames
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    start = time.perf_counter()
+    for num in range(count):
+        frame(num)
+    elapsed = time.perf_counter() - start
+    frames = max(win.frames - frames, 1)
+    gc.collect()
+    return {
+        "build_ms": build * 1000,
+        "memory_kb": memory / 1024,
+        "frames": frames,
+        "fps": frames / elapsed,
+        "calls_per_frame": (win.calls - calls) / frames,
+        "blocks_per_frame": (sys.getallocatedblocks() - blocks) / frames,
+    }
+
+def run_scene(name):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--scene", name], stdout=subprocess.PIPE, universal_newlines=True, check=True).stdout
+    return json.loads(out)
+
+def check(results, baseline, tolerance):
+    """Returns a list of the results that got worse than ``baseline`` by more than ``tolerance``"""
+    worse = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for key in ("calls_per_frame", "memory_kb"):
+            old = baseline[name][key]
+            if result[key] > old * (1 + tolerance) + 1:
+                worse.append("%s %s: %.1f -> %.1f" % (name, key, old, result[key]))
+        # fps is noisy, so it may drop by twice the tolerance
+        old = baseline[name]["fps"]
+        if result["fps"] < old * (1 - 2 * tolerance):
+            worse.append("%s fps: %.1f -> %.1f" % (name, old, result["fps"]))
+    return worse
+
+def main():
+    parser = argparse.ArgumentParser(description="PyPoints render benchmarks")
+    parser.add_argument("scenes", nargs="*", help="scenes to run: " + ", ".join(SCENES))
+    parser.add_argument("--save", help="save the results to a json file")
+    parser.add_argument("--check", help="compare against results saved with --save")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown for --check (default 0.25)")
+    parser.add_argument("--scene", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scene:
+        print(json.dumps(measure(args.scene)))
+        return 0
+
+    results = {}
+    print("%-8s %10s %10s %7s %9s %12s %12s" % ("scene", "build ms", "memory kB", "frames", "fps", "calls/frame", "blocks/frame"))
+    for name in args.scenes or SCENES:
+        result = results[name] = run_scene(name)
+        print("%-8s %10.1f %10.1f %7d %9.1f %12.1f %12.1f" % (name, result["build_ms"], result["memory_kb"], result["frames"], result["fps"], result["calls_per_frame"], result["blocks_per_frame"]))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=4)
+    if args.check:
+        with open(args.check, "r") as f:
+            worse = check(results, json.load(f), args.tolerance)
+        for line in worse:
+            print("REGRESSION: " + line)
+        return 1 if worse else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,19 +12,87 @@ This module give you tools to use to build with these points.
 # 4: Change method for objects
 # 5: Progress bar (galaxy.py)
 
-# vvv EXTRAS vvv
-# Multiline text box
-# Diagonal line
-
 __docformat__ = "reStructuredText"
 
+import atexit
 import curses
-import json
 import time as t
-import pickle as p
+from array import array
+from collections import OrderedDict, deque
+
+class Logger():
+    """The PyPoints logger. The log file is opened on the first message and kept open, and messages are buffered.
+    Messages are only formatted when their level is logged, so disabled debug messages cost almost nothing
+    
+    :param path: (optional) (default ``"pypointslog.txt"``) The log file. ``None`` disables logging
+    :type path: string
+    :param level: (optional) (default ``Logger.INFO``) The lowest level that is logged
+    :type level: int
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        PYPOINTS_LOGGER.debug("Moved %s points", 10)
+    
+    .. note:: Debug messages are also logged if ``pypoints.log_debug`` is ``True``
+    
+    .. seealso:: :func:`log`, :func:`set_log`
+    """
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+    
+    def __init__(self, path="pypointslog.txt", level=INFO):
+        self.path = path
+        self.level = level
+        self.file = None
+    
+    def enabled(self, level):
+        """Returns ``True`` if messages of ``level`` are logged"""
+        if self.path is None:
+            return False
+        return level >= self.level or (level == self.DEBUG and log_debug)
+    
+    def write(self, level, txt, args=()):
+        if not self.enabled(level):
+            return None
+        if args:
+            txt = txt % args
+        if self.file is None:
+            self.file = open(self.path, "w")
+            atexit.register(self.close)
+        self.file.write(str(txt) + "\n")
+        if level >= self.WARNING:
+            self.file.flush()
+    
+    def debug(self, txt, *args):
+        self.write(self.DEBUG, txt, args)
+    
+    def info(self, txt, *args):
+        self.write(self.INFO, txt, args)
+    
+    def warning(self, txt, *args):
+        self.write(self.WARNING, txt, args)
+    
+    def error(self, txt, *args):
+        self.write(self.ERROR, txt, args)
+    
+    def flush(self):
+        """Writes the buffered messages to the log file"""
+        if self.file is not None:
+            self.file.flush()
+    
+    def close(self):
+        """Closes the log file. It is opened again by the next message"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+global PYPOINTS_LOGGER
+PYPOINTS_LOGGER = Logger()
 
-with open("pypointslog.txt", "w") as f:
-        f.write("")
 def log(txt, debug=False):
     """Outputs argument txt to pypointslog.txt
 
@@ -40,12 +108,32 @@ def log(txt, debug=False):
         log('Hello!')
     
         log({'foo': 'bar'})
+    
+    .. seealso:: :class:`Logger`, :func:`set_log`
     """
-    if debug == False or (debug == True and log_debug):
-        with open("pypointslog.txt", "a") as f:
-            f.write(str(txt) + "\n")
+    PYPOINTS_LOGGER.write(Logger.DEBUG if debug else Logger.INFO, txt)
 
-def IncompatibleBlueprintType(Exception):
+def set_log(path="pypointslog.txt", level=Logger.INFO):
+    """Changes where and what PyPoints logs
+    
+    :param path: (optional) (default ``"pypointslog.txt"``) The log file. ``None`` disables logging
+    :type path: string
+    :param level: (optional) (default ``Logger.INFO``) The lowest level that is logged. Use ``Logger.DEBUG`` to log everything
+    :type level: int
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        set_log(None)
+    
+        set_log("/tmp/app.log", Logger.DEBUG)
+    """
+    PYPOINTS_LOGGER.close()
+    PYPOINTS_LOGGER.path = path
+    PYPOINTS_LOGGER.level = level
+
+class IncompatibleBlueprintType(Exception):
     """An error that is called when the wrong blueprint is given to a
     blueprint using function
 
@@ -67,7 +155,8 @@ def run(r):
     
     - r.\ **run**\ (win)
           Main program code goes here.
-          Once it finishes, it get ran again
+          Once it finishes, it get ran again.
+          Read keys with :func:`getkey` or :func:`keys`
     
     :Example:
     
@@ -79,92 +168,1432 @@ def run(r):
                 self.font = Font()
                 self.point = Point("a", 0, 0, 0)
             def run(self, win):
-                if win.getkey == "c":
+                if getkey(win) == "c":
                     return False
         r = program()
         run(r)
+    
+    .. warning:: Do not mix :func:`getkey` with ``win.getkey()``. Widgets like :class:`MenuBox` put the keys typed after
+                 their end key back in the PyPoints key queue, and ``win.getkey()`` does not see them, so they are lost
     """
     def torun(win):
         log("Colors enabled: " + str(curses.has_colors()))
-        log("Starting r.pre")
-        r.pre(win)
-        try:
-            for i in PYPOINTS_POINTREGISTRY.runlist:
-                if i.field == field:
-                    i.draw(win)
-        except Exception as e:
-            log(e)
-        win.refresh()
-        log("Starting loop")
-        while r.run(win) != False:
-            log("Loop", debug=True)
-            win.clear()
-            try:
-                for i in PYPOINTS_POINTREGISTRY.runlist:
-                    if i.field == field:
-                        i.draw(win)
-            except Exception as e:
-                log(e)
-            win.refresh()
+        _loop(r, win)
+    curses.wrapper(torun)
+
+def _loop(r, win):
+    """The loop behind :func:`run` and :func:`run_headless`"""
+    log("Starting r.pre")
+    r.pre(win)
+    refresh(win, True)
+    log("Starting loop")
+    while PYPOINTS_STATS.timed(r.run, win) != False:
+        PYPOINTS_LOGGER.debug("Loop")
+        refresh(win)
+
+def run_headless(r, win=None):
+    """Runs argument r like :func:`run`, but on a :class:`HeadlessWindow` instead of a terminal.
+    The loop also ends when r reads a key after the scripted keys ran out
+    
+    :param r: The class that is run
+    :type r: object
+    :param win: (optional) The window. Defaults to an empty 80x24 :class:`HeadlessWindow`
+    :type win: :class:`HeadlessWindow`
+    :return: The window, to check what was drawn
+    :rtype: :class:`HeadlessWindow`
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        win = run_headless(program(), HeadlessWindow(keys=["KEY_DOWN", "\\n"]))
+        print(win.text())
+    
+    .. seealso:: :func:`run`, :func:`use_headless`
+    """
+    use_headless()
+    if win is None:
+        win = HeadlessWindow()
+    try:
+        _loop(r, win)
+    except EOFError:
+        log("Headless input ended")
+    return win
+
+def run_async(r, fps=30):
+    """Runs argument r on an ``asyncio`` event loop. Keys are read without blocking when stdin is readable,
+    and the screen is redrawn at most ``fps`` times a second, only when something changed.
+    While idle, the program sleeps instead of polling
+    
+    :param r: The class that is run
+    :type r: object
+    :param fps: (optional) (default ``30``) The highest number of frames drawn per second. ``0`` draws every change right away
+    :type fps: int
+    
+    - r.\ **pre**\ (win)
+          Run before anything else.
+          Initialize any objects here. May be a coroutine function
+    
+    - r.\ **key**\ (win, key)
+          (optional) Run for every key pressed.
+          Return ``False`` to exit. May be a coroutine function
+    
+    - r.\ **run**\ (win)
+          (optional) A coroutine function that is awaited over and over while keys are handled.
+          Return ``False`` to exit
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        class program():
+            def pre(self, win):
+                self.clock = Text(0, 0, "0", 0, Font(Color(green, black)))
+                every(1, self.tick)
+            def tick(self):
+                self.clock.remove()
+                self.clock = Text(0, 0, str(int(self.clock.text) + 1), 0, self.clock.font)
+            def key(self, win, key):
+                if key == "q":
+                    return False
+        run_async(program())
+    
+    .. warning:: The window is in no-delay mode, so ``win.getkey()`` raises instead of waiting for a key. Use r.\ **key** instead
+    
+    .. seealso:: :func:`run`, :func:`schedule`, :func:`every`
+    """
+    import asyncio
+    
+    def torun(win):
+        log("Colors enabled: " + str(curses.has_colors()))
+        asyncio.run(AsyncRunner(r, win, fps).main())
     curses.wrapper(torun)
 
+def schedule(delay, callback, *args):
+    """Runs ``callback(*args)`` once after ``delay`` seconds. Only works inside :func:`run_async`.
+    ``callback`` may be a coroutine function
+    
+    :param delay: Seconds to wait
+    :type delay: float
+    :param callback: The function that is run
+    :type callback: function
+    :return: A handle with a ``cancel()`` method
+    
+    .. seealso:: :func:`every`, :func:`run_async`
+    """
+    import asyncio
+    runner = PYPOINTS_ASYNCRUNNER
+    return asyncio.get_running_loop().call_later(delay, lambda: runner.spawn(runner.call(callback, *args)))
+
+def every(interval, callback, *args):
+    """Runs ``callback(*args)`` every ``interval`` seconds. Only works inside :func:`run_async`.
+    ``callback`` may be a coroutine function. Return ``False`` from it to stop
+    
+    :param interval: Seconds between calls
+    :type interval: float
+    :param callback: The function that is run
+    :type callback: function
+    :return: The ``asyncio.Task`` running the timer. Cancel it to stop
+    
+    .. seealso:: :func:`schedule`, :func:`run_async`
+    """
+    import asyncio
+    
+    async def timer():
+        loop = asyncio.get_running_loop()
+        due = loop.time()
+        while True:
+            due += interval
+            await asyncio.sleep(max(due - loop.time(), 0))
+            if await PYPOINTS_ASYNCRUNNER.call(callback, *args) == False:
+                return None
+    return PYPOINTS_ASYNCRUNNER.spawn(timer())
+
+class AsyncRunner():
+    """The event loop behind :func:`run_async`. It watches the :class:`PointRegistry` so it only draws a frame after a change
+    
+    .. warning:: Do not use this class. It is an internal usage class only. Use :func:`run_async`
+    
+    .. seealso:: :func:`run_async`
+    """
+    def __init__(self, r, win, fps):
+        self.r = r
+        self.win = win
+        self.interval = 1 / fps if fps else 0
+        self.changed = None
+        self.done = None
+        self.tasks = set()
+    
+    def wants(self, cfield):
+        return cfield == field and not self.changed.is_set()
+    
+    def invalidate(self, cfield, x, y):
+        if cfield == field:
+            self.changed.set()
+    
+    async def call(self, callback, *args):
+        """Runs ``callback``, awaiting it if it is a coroutine, then wakes the frame loop"""
+        import inspect
+        start = t.perf_counter()
+        result = callback(*args)
+        if inspect.isawaitable(result):
+            result = await result
+        PYPOINTS_STATS.run_time += t.perf_counter() - start
+        self.changed.set()
+        return result
+    
+    def spawn(self, coro):
+        """Runs ``coro`` as a task that is cancelled when the loop exits"""
+        import asyncio
+        task = asyncio.get_running_loop().create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.finished)
+        return task
+    
+    def finished(self, task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None and not self.done.done():
+            self.done.set_exception(task.exception())
+    
+    def stop(self):
+        if not self.done.done():
+            self.done.set_result(None)
+    
+    def read(self):
+        """Handles every key that is waiting on stdin"""
+        PYPOINTS_INPUT.poll(self.win, False)
+        for key in PYPOINTS_INPUT.take():
+            PYPOINTS_LOGGER.debug("Key pressed: %s", key)
+            if key == "KEY_RESIZE":
+                resize(self.win)
+            if hasattr(self.r, "key"):
+                self.spawn(self.key(key))
+    
+    async def key(self, key):
+        if await self.call(self.r.key, self.win, key) == False:
+            self.stop()
+    
+    async def frames(self):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.changed.wait()
+            self.changed.clear()
+            start = loop.time()
+            refresh(self.win)
+            await asyncio.sleep(max(self.interval - (loop.time() - start), 0))
+    
+    async def program(self):
+        while await self.call(self.r.run, self.win) != False:
+            pass
+        self.stop()
+    
+    async def main(self):
+        import asyncio
+        import sys
+        global PYPOINTS_ASYNCRUNNER
+        loop = asyncio.get_running_loop()
+        self.changed = asyncio.Event()
+        self.done = loop.create_future()
+        PYPOINTS_ASYNCRUNNER = self
+        PYPOINTS_POINTREGISTRY.watchers.append(self)
+        self.win.nodelay(True)
+        self.win.keypad(True)
+        try:
+            log("Starting r.pre")
+            await self.call(self.r.pre, self.win)
+            refresh(self.win, True)
+            self.spawn(self.frames())
+            if hasattr(self.r, "run"):
+                self.spawn(self.program())
+            loop.add_reader(sys.stdin.fileno(), self.read)
+            log("Starting loop")
+            await self.done
+        finally:
+            loop.remove_reader(sys.stdin.fileno())
+            for task in list(self.tasks):
+                task.cancel()
+            PYPOINTS_POINTREGISTRY.watchers.remove(self)
+            PYPOINTS_ASYNCRUNNER = None
+
 class ColorGet():
     """A PyPoints registry class that is used to register curses color numbers.
+    Identical colors share one number, and numbers of released colors are reused
     
     .. warning:: Do not use this class. It is an internal usage class only
     """
     def __init__(self):
-        self.used = []
+        self.count = 0
+        self.free = []
+        self.colors = {}
         
     def get(self):
-        self.used.append(len(self.used) + 1)
-        return len(self.used)
+        if self.free:
+            return self.free.pop()
+        self.count += 1
+        return self.count
+    
+    def release(self, number):
+        self.free.append(number)
 
 class PointRegistry():
-    """A PyPoints registry class that is used to register :class:`Point`
+    """A PyPoints registry class that is used to register :class:`Point` and :class:`PointBuffer`.
+    Points are indexed by field and by ``(x, y)`` cell, and buffers by field and by the tiles they cover,
+    so only the active field is visited when drawing
     
     .. warning:: Do not use this class. It is an internal usage class only
     
-    .. seealso:: :class:`Point`
+    .. seealso:: :class:`Point`, :class:`PointBuffer`
     """
+    tile = 16
+    
     def __init__(self):
-        self.list = []
-        self.runlist = []
+        self.count = 0
+        self.points = {}
+        self.fields = {}
+        self.cells = {}
+        self.tiles = {}
+        self.watchers = []
+        self.deferred = []
+    
+    @property
+    def runlist(self):
+        """Every registered point and buffer in the order they were registered"""
+        return list(self.points.values())
     
     def register(self, point):
-        self.list.append(len(self.list) + 1)
-        self.runlist.append(point)
-        log("Registered point " + str(len(self.list)), True)
-        #log(self.runlist[len(self.list)-1])
-        return len(self.list)
+        self.count += 1
+        point.regid = self.count
+        self.points[point.regid] = point
+        self.fields.setdefault(point.field, {})[point.regid] = point
+        self._index(point)
+        self.invalidate_all(point)
+        PYPOINTS_LOGGER.debug("Registered point %d", self.count)
+        return self.count
     
     def remove(self, point):
-        #log(len(self.runlist))
-        self.runlist.remove(point)
+        if self.points.pop(point.regid, None) is None:
+            return None
+        del self.fields[point.field][point.regid]
+        if isinstance(point, Point):
+            self._unindex(point, point.field, point.x, point.y)
+        else:
+            self._untile(point)
+        self.invalidate_all(point)
+    
+    def remove_many(self, points):
+        """Removes every point in ``points``. Used by shapes and lines"""
+        for i in points:
+            if i.activated:
+                self.remove(i)
+                i.activated = False
+    
+    def move(self, point, cfield, x, y):
+        """Moves ``point`` from cell ``x``, ``y`` on field ``cfield`` to its current cell in the index"""
+        if cfield != point.field:
+            del self.fields[cfield][point.regid]
+            self.fields.setdefault(point.field, {})[point.regid] = point
+        self._unindex(point, cfield, x, y)
+        self._index(point)
+        self.invalidate(cfield, x, y)
+        self.invalidate(point.field, point.x, point.y)
+    
+    def reindex(self, buffer):
+        """Updates the tiles of ``buffer`` after its bounds or field changed"""
+        cfield = buffer.indexed[0]
+        if cfield != buffer.field:
+            del self.fields[cfield][buffer.regid]
+            self.fields.setdefault(buffer.field, {})[buffer.regid] = buffer
+        self._untile(buffer)
+        self._index(buffer)
+    
+    def _index(self, point):
+        if not isinstance(point, Point):
+            return self._tile(point)
+        stack = self.cells.setdefault(point.field, {}).setdefault((point.x, point.y), [])
+        stack.append(point)
+        if len(stack) > 1 and stack[-2].regid > point.regid:
+            stack.sort(key=lambda i: i.regid)
+    
+    def _unindex(self, point, cfield, x, y):
+        cells = self.cells[cfield]
+        stack = cells[(x, y)]
+        stack.remove(point)
+        if not stack:
+            del cells[(x, y)]
+    
+    def _tile(self, buffer):
+        bounds = buffer.bounds()
+        buffer.indexed = (buffer.field, bounds)
+        if bounds is None:
+            return None
+        tiles = self.tiles.setdefault(buffer.field, {})
+        for tile in self._tiles_in(bounds):
+            tiles.setdefault(tile, {})[buffer.regid] = buffer
+    
+    def _untile(self, buffer):
+        cfield, bounds = buffer.indexed
+        if bounds is None:
+            return None
+        tiles = self.tiles[cfield]
+        for tile in self._tiles_in(bounds):
+            found = tiles[tile]
+            del found[buffer.regid]
+            if not found:
+                del tiles[tile]
+    
+    def _tiles_in(self, bounds):
+        size = self.tile
+        for ty in range(bounds[1] // size, (bounds[3] - 1) // size + 1):
+            for tx in range(bounds[0] // size, (bounds[2] - 1) // size + 1):
+                yield (tx, ty)
+    
+    def in_field(self, cfield):
+        """Returns the points and buffers on field ``cfield`` in the order they are drawn"""
+        return self.fields.get(cfield, {}).values()
+    
+    def at(self, x, y, cfield):
+        """Returns the points and buffers at cell ``x``, ``y`` on field ``cfield``. The last one is drawn on top"""
+        stack = self.cells.get(cfield, {}).get((x, y), ())
+        tile = self.tiles.get(cfield, {}).get((x // self.tile, y // self.tile))
+        if not tile:
+            return stack
+        found = list(stack)
+        for i in tile.values():
+            if i.glyph(x, y) is not None:
+                found.append(i)
+        found.sort(key=lambda i: i.regid)
+        return found
+    
+    def in_rect(self, x, y, width, height, cfield):
+        """Returns the points and buffers inside the rectangle that starts at ``x``, ``y`` on field ``cfield``
+        in the order they are drawn, so the last one is on top like in :func:`~pypoints.PointRegistry.at`"""
+        cells = self.cells.get(cfield, {})
+        found = []
+        if width * height <= len(cells):
+            for cy in range(y, y + height):
+                for cx in range(x, x + width):
+                    found.extend(cells.get((cx, cy), ()))
+        else:
+            for cell, stack in cells.items():
+                if x <= cell[0] < x + width and y <= cell[1] < y + height:
+                    found.extend(stack)
+        tiles = self.tiles.get(cfield, {})
+        if tiles and width > 0 and height > 0:
+            buffers = {}
+            for tile in self._tiles_in((x, y, x + width, y + height)):
+                buffers.update(tiles.get(tile, ()))
+            for i in buffers.values():
+                bounds = i.indexed[1]
+                if bounds[0] < x + width and x < bounds[2] and bounds[1] < y + height and y < bounds[3]:
+                    found.append(i)
+        found.sort(key=lambda i: i.regid)
+        return found
+    
+    def invalidate(self, cfield, x, y):
+        """Tells every watching :class:`Renderer` that the cell at ``x``, ``y`` on field ``cfield`` changed"""
+        for i in self.watchers:
+            i.invalidate(cfield, x, y)
+    
+    def invalidate_all(self, point):
+        """Invalidates every cell of a point or buffer"""
+        for i in self.watchers:
+            if i.wants(point.field):
+                for cell in point.cells():
+                    i.invalidate(point.field, cell[0], cell[1])
+    
+    def defer(self, item):
+        """Calls ``item.sync()`` before the next frame is drawn, so an object that changes many times between frames updates its points once"""
+        if item not in self.deferred:
+            self.deferred.append(item)
+    
+    def sync(self):
+        """Runs the ``sync()`` of every object passed to PointRegistry.\ :func:`~pypoints.PointRegistry.defer`"""
+        while self.deferred:
+            items = self.deferred
+            self.deferred = []
+            for i in items:
+                i.sync()
+    
+    def invalidate_many(self, cfield, cells):
+        """Invalidates every ``(x, y)`` cell in ``cells`` on field ``cfield``"""
+        for i in self.watchers:
+            if i.wants(cfield):
+                for cell in cells:
+                    i.invalidate(cfield, cell[0], cell[1])
 
 class FontRegistry():
-    """A PyPoints registry class that is used to register :class:`Font`
+    """A PyPoints registry class that is used to register :class:`Font`.
+    Identical fonts share one regid, and regids of released fonts are reused
     
     .. warning:: Do not use this class. It is an internal usage class only"""
     def __init__(self):
         self.list = []
-        self.idlist = []
+        self.fonts = {}
+        self.free = []
     
     def register(self, font):
-        self.list.append(font)
-        self.idlist.append(len(self.list) - 1)
-        log("Registered font " + str(len(self.list) - 1))
-        return len(self.list) - 1
+        if self.free:
+            regid = self.free.pop()
+            self.list[regid] = font
+        else:
+            self.list.append(font)
+            regid = len(self.list) - 1
+        log("Registered font " + str(regid))
+        return regid
+    
+    def release(self, font):
+        self.list[font.regid] = None
+        self.free.append(font.regid)
     
     def get(self, font):
         return self.list[int(font)]
 
+class Renderer():
+    """A PyPoints rendering class that draws a field onto a curses window.
+    It keeps a back buffer of the last frame and only writes the cells that changed since then,
+    so there is no need to clear the window between frames
+    
+    .. warning:: Do not use this class. It is an internal usage class only. Use :func:`refresh`
+    
+    .. seealso:: :class:`PointRegistry`, :func:`refresh`
+    """
+    def __init__(self, registry):
+        self.registry = registry
+        self.front = {}
+        self.dirty = set()
+        self.stale = True
+        self.win = None
+        self.field = None
+        self.clip = None
+        self.area = None
+        self.origin = (0, 0)
+        self.shift = (0, 0)
+        self.visited = 0
+        registry.watchers.append(self)
+    
+    def view(self, clip, origin=(0, 0)):
+        """Only draws the cells inside ``clip``, a rectangle ``(x, y, width, height)`` on the field, with its
+        corner at ``origin`` on the window. ``None`` draws the part of the field that fits on the window at its own positions.
+        Moving a clip of the same size keeps the back buffer, so scrolling only writes the cells that differ"""
+        if clip == self.clip and origin == self.origin:
+            return None
+        if self.clip is not None and clip is not None and origin == self.origin and clip[2:] == self.clip[2:]:
+            dx = clip[0] - self.clip[0]
+            dy = clip[1] - self.clip[1]
+            self.front = {(cell[0] + dx, cell[1] + dy): glyph for cell, glyph in self.front.items()}
+        else:
+            self.win = None
+        self.clip = clip
+        self.area = clip
+        self.origin = origin
+        self.shift = (0, 0) if clip is None else (origin[0] - clip[0], origin[1] - clip[1])
+        self.stale = True
+    
+    def wants(self, cfield):
+        """Returns ``True`` if changes to field ``cfield`` need to be passed to Renderer.\ :func:`~pypoints.Renderer.invalidate`"""
+        return cfield == self.field and not self.stale
+    
+    def invalidate(self, cfield, x, y):
+        """Marks the cell at ``x``, ``y`` as changed. Cells on fields other than the last drawn field are ignored.
+        Once more cells are dirty than are on screen, the next frame is composed from scratch instead"""
+        if cfield == self.field and not self.stale:
+            area = self.area
+            if area is not None and not (area[0] <= x < area[0] + area[2] and area[1] <= y < area[1] + area[3]):
+                return None
+            self.dirty.add((x, y))
+            if len(self.dirty) * 3 > len(self.front):
+                self.stale = True
+                self.dirty = set()
+    
+    def compose(self, cfield):
+        """Returns the frame for field ``cfield`` as a dict of ``(x, y)``: ``(char, attr)``. Only the points
+        inside the drawn area are visited, found with PointRegistry.\ :func:`~pypoints.PointRegistry.in_rect`"""
+        back = {}
+        visited = 0
+        clip = self.area
+        if clip is None:
+            for i in self.registry.in_field(cfield):
+                for x, y, char, attr in i.cells():
+                    back[(x, y)] = (char, attr)
+                    visited += 1
+            self.visited = visited
+            return back
+        x0, y0 = clip[0], clip[1]
+        x1, y1 = x0 + clip[2], y0 + clip[3]
+        for i in self.registry.in_rect(x0, y0, clip[2], clip[3], cfield):
+            for x, y, char, attr in i.cells():
+                visited += 1
+                if x0 <= x < x1 and y0 <= y < y1:
+                    back[(x, y)] = (char, attr)
+        self.visited = visited
+        return back
+    
+    def glyph(self, x, y, cfield):
+        """Returns the ``(char, attr)`` on top of cell ``x``, ``y``, or ``None`` if the cell is empty"""
+        stack = self.registry.at(x, y, cfield)
+        if not stack:
+            return None
+        return stack[-1].glyph(x, y)
+    
+    def render(self, win, cfield, full=False):
+        """Draws field ``cfield`` onto ``win``, writing only the cells that changed since the last frame
+        
+        :param full: (optional) (default ``False``) Clear the window and draw every cell
+        :type full: bool
+        """
+        start = t.perf_counter()
+        counts = self.draw(win, cfield, full)
+        if counts is None:
+            return None
+        drawn = t.perf_counter()
+        win.noutrefresh()
+        if not headless:
+            curses.doupdate()
+        end = t.perf_counter()
+        PYPOINTS_STATS.record({"time": end, "field": cfield, "size": win.getmaxyx(), "draw": drawn - start, "refresh": end - drawn,
+                               "visited": self.visited, "drawn": counts[0], "calls": counts[1] + (1 if headless else 2)})
+    
+    def draw(self, win, cfield, full=False):
+        """Writes the cells of field ``cfield`` that changed since the last frame onto ``win``, without refreshing it.
+        Returns the number of cells and of curses calls written, or ``None`` if nothing changed.
+        Without a clip, only the cells that fit on the window are drawn, and a change of window size redraws every cell"""
+        if self.registry.deferred:
+            self.registry.sync()
+        if self.clip is None:
+            lines, cols = win.getmaxyx()
+            if self.area != (0, 0, cols, lines):
+                self.area = (0, 0, cols, lines)
+                full = True
+        if full or win is not self.win:
+            if self.clip is None:
+                win.erase()
+            else:
+                for y in range(self.clip[1], self.clip[1] + self.clip[3]):
+                    self.write(win, (self.clip[0], y), (" " * self.clip[2], 0))
+            self.front = {}
+            self.win = win
+            self.stale = True
+        elif cfield != self.field:
+            self.stale = True
+        elif not self.dirty and not self.stale:
+            return None
+        dirty = self.dirty
+        self.dirty = set()
+        front = self.front
+        writes = {}
+        
+        if not self.stale:
+            self.visited = len(dirty)
+            for cell in dirty:
+                glyph = self.glyph(cell[0], cell[1], cfield)
+                if glyph is None:
+                    if cell in front:
+                        del front[cell]
+                        writes[cell] = (" ", 0)
+                elif front.get(cell) != glyph:
+                    front[cell] = glyph
+                    writes[cell] = glyph
+        else:
+            self.stale = False
+            self.field = cfield
+            back = self.compose(cfield)
+            for cell in front:
+                if cell not in back:
+                    writes[cell] = (" ", 0)
+            for cell, glyph in back.items():
+                if front.get(cell) != glyph:
+                    writes[cell] = glyph
+            self.front = back
+        return (len(writes), self.write_runs(win, writes))
+    
+    def write_runs(self, win, writes):
+        """Writes ``writes``, a dict of ``(x, y)``: ``(char, attr)``. Neighbouring cells on the same row
+        with the same attr are merged into a single ``addstr`` call. Returns the number of calls"""
+        return _write_runs(win, writes, self.shift)
+    
+    def write(self, win, cell, glyph):
+        _write(win, cell, glyph, self.shift)
+
+def _write_runs(win, writes, shift=(0, 0)):
+    """The run merging behind Renderer.\ :func:`~pypoints.Renderer.write_runs`"""
+    calls = 0
+    run = []
+    start = None
+    attr = None
+    nx = None
+    ny = None
+    for cell in sorted(writes, key=lambda i: (i[1], i[0])):
+        char, cattr = writes[cell]
+        if cell[0] == nx and cell[1] == ny and cattr == attr:
+            run.append(char)
+        else:
+            if run:
+                _write(win, start, ("".join(run), attr), shift)
+                calls += 1
+            run = [char]
+            start = cell
+            attr = cattr
+            ny = cell[1]
+        nx = cell[0] + 1
+    if run:
+        _write(win, start, ("".join(run), attr), shift)
+        calls += 1
+    return calls
+
+def _write(win, cell, glyph, shift=(0, 0)):
+    try:
+        win.addstr(cell[1] + shift[1], cell[0] + shift[0], glyph[0], glyph[1])
+    except curses.error:
+        PYPOINTS_LOGGER.debug("Cannot draw point at %s", cell)
+
+class HeadlessWindow():
+    """An in-memory stand-in for a curses window, for running PyPoints without a terminal.
+    It keeps the drawn cells, counts curses calls and frames, and reads keys from a script
+    
+    :param lines: (optional) (default ``24``) The height of the window
+    :type lines: int
+    :param cols: (optional) (default ``80``) The width of the window
+    :type cols: int
+    :param keys: (optional) The keys returned by ``getkey()``, in order. Curses key names like ``"KEY_UP"`` are allowed.
+                 ``getch()`` returns other keys as utf-8 bytes, so a longer string is read as several keys, like a paste
+    :type keys: iterable of string
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        use_headless()
+        win = HeadlessWindow(keys=["a", "b", "\\n"])
+        Text(0, 0, "Hello", 0, Font(Color(white, black)))
+        refresh(win)
+        print(win.text())
+    
+    .. note:: When the scripted keys run out, ``getkey()`` raises ``curses.error`` in no-delay mode and ``EOFError`` otherwise
+    
+    .. seealso:: :func:`use_headless`, :func:`run_headless`
+    """
+    def __init__(self, lines=24, cols=80, keys=()):
+        self.lines = lines
+        self.cols = cols
+        self.keys = deque(keys)
+        self.bytes = deque()
+        self.cells = {}
+        self.cursor = (0, 0)
+        self.delay = True
+        self.calls = 0
+        self.frames = 0
+        self.touched = None
+    
+    def feed(self, keys):
+        """Adds ``keys`` to the end of the key script"""
+        self.keys.extend(keys)
+    
+    def addstr(self, y, x, text, attr=0):
+        self.calls += 1
+        if not (0 <= y < self.lines and 0 <= x < self.cols):
+            raise curses.error("addstr() returned ERR")
+        for i, char in enumerate(text):
+            if x + i >= self.cols:
+                raise curses.error("addstr() returned ERR")
+            self.cells[(x + i, y)] = (char, attr)
+        if self.touched is not None:
+            self.touched.update((x + i, y) for i in range(len(text)))
+        self.cursor = (min(x + len(text), self.cols - 1), y)
+    
+    def erase(self):
+        self.calls += 1
+        self.cells = {}
+        if self.touched is not None:
+            self.touched.update((x, y) for y in range(self.lines) for x in range(self.cols))
+    
+    def clear(self):
+        self.erase()
+    
+    def refresh(self):
+        self.calls += 1
+        self.frames += 1
+    
+    def noutrefresh(self):
+        self.calls += 1
+        self.frames += 1
+    
+    def move(self, y, x):
+        if not (0 <= y < self.lines and 0 <= x < self.cols):
+            raise curses.error("wmove() returned ERR")
+        self.cursor = (x, y)
+    
+    def getmaxyx(self):
+        return (self.lines, self.cols)
+    
+    def resize(self, lines, cols):
+        """Changes the size of the window, like a terminal resize. Cells past the new edges are dropped"""
+        self.lines = lines
+        self.cols = cols
+        self.cells = {cell: glyph for cell, glyph in self.cells.items() if cell[0] < cols and cell[1] < lines}
+    
+    def nodelay(self, flag):
+        self.delay = not flag
+    
+    def timeout(self, delay):
+        self.delay = delay < 0
+    
+    def keypad(self, flag):
+        pass
+    
+    def getkey(self):
+        if self.keys:
+            return self.keys.popleft()
+        if not self.delay:
+            raise curses.error("no input")
+        raise EOFError("No more scripted keys")
+    
+    def getch(self):
+        if self.bytes:
+            return self.bytes.popleft()
+        try:
+            key = self.getkey()
+        except curses.error:
+            return curses.ERR
+        if key.startswith("KEY_"):
+            return getattr(curses, key, curses.ERR)
+        self.bytes.extend(key.encode("utf-8"))
+        return self.bytes.popleft()
+    
+    def text(self):
+        """Returns what is drawn on the window as a string, one line per row"""
+        rows = []
+        for y in range(self.lines):
+            rows.append("".join(self.cells.get((x, y), (" ", 0))[0] for x in range(self.cols)).rstrip())
+        return "\n".join(rows).rstrip("\n")
+
+def use_headless(on=True):
+    """Lets :class:`Color` and :class:`Font` be made and frames be drawn without a terminal, for use with :class:`HeadlessWindow`
+    
+    :param on: (optional) (default ``True``) ``False`` goes back to using curses
+    :type on: bool
+    
+    .. seealso:: :class:`HeadlessWindow`, :func:`run_headless`
+    """
+    global headless
+    headless = on
+
+class FrameStats():
+    """Keeps the timings and counts of the last ``size`` frames drawn by :class:`Renderer`, and passes each frame to the frame hooks
+    
+    Every frame is a dict with these keys:
+    
+    - **time**: When the frame ended, from ``time.perf_counter()``
+    - **field**: The field that was drawn, or a tuple of the fields of the visible layers for a :class:`Compositor`
+    - **size**: The ``(lines, cols)`` of the window
+    - **run**: Seconds spent in r.\ **run** (or in callbacks under :func:`run_async`) since the last frame
+    - **draw**: Seconds spent finding and writing the changed cells
+    - **refresh**: Seconds spent in ``noutrefresh`` and ``doupdate``
+    - **visited**: The number of points looked at
+    - **drawn**: The number of cells written
+    - **calls**: The number of curses calls
+    
+    .. warning:: Do not use this class. It is an internal usage class only. Use :func:`frame_stats` and :func:`add_frame_hook`
+    
+    .. seealso:: :func:`frame_stats`, :func:`add_frame_hook`, :class:`StatsOverlay`
+    """
+    def __init__(self, size=120):
+        self.frames = deque(maxlen=size)
+        self.hooks = []
+        self.run_time = 0.0
+    
+    def timed(self, callback, *args):
+        """Runs ``callback(*args)`` and adds its time to the ``run`` time of the next frame"""
+        start = t.perf_counter()
+        try:
+            return callback(*args)
+        finally:
+            self.run_time += t.perf_counter() - start
+    
+    def record(self, frame):
+        frame["run"] = self.run_time
+        self.run_time = 0.0
+        self.frames.append(frame)
+        for i in list(self.hooks):
+            i(frame)
+    
+    def summary(self):
+        """Returns the average of the kept frames as a dict with ``fps``, ``frames`` and the average ``run``, ``draw``,
+        ``refresh``, ``visited``, ``drawn`` and ``calls`` per frame"""
+        frames = self.frames
+        result = {"fps": 0.0, "frames": len(frames)}
+        for key in ("run", "draw", "refresh", "visited", "drawn", "calls"):
+            result[key] = sum(i[key] for i in frames) / len(frames) if frames else 0
+        if len(frames) > 1 and frames[-1]["time"] > frames[0]["time"]:
+            result["fps"] = (len(frames) - 1) / (frames[-1]["time"] - frames[0]["time"])
+        return result
+
+def frame_stats():
+    """Returns the rolling stats of the last frames drawn
+    
+    :return: ``fps``, ``frames`` and the average ``run``, ``draw`` and ``refresh`` seconds and ``visited``, ``drawn`` and ``calls`` counts per frame
+    :rtype: dict
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        stats = frame_stats()
+        log("%.1f fps, %.2f ms drawing" % (stats["fps"], stats["draw"] * 1000))
+    
+    .. seealso:: :func:`add_frame_hook`, :class:`FrameStats`
+    """
+    return PYPOINTS_STATS.summary()
+
+def add_frame_hook(hook):
+    """Calls ``hook(frame)`` after every frame is drawn. ``frame`` is a dict described in :class:`FrameStats`
+    
+    :param hook: The function that is called
+    :type hook: function
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        def slow(frame):
+            if frame["draw"] > 0.01:
+                log(frame)
+        add_frame_hook(slow)
+    
+    .. seealso:: :func:`remove_frame_hook`, :func:`frame_stats`
+    """
+    PYPOINTS_STATS.hooks.append(hook)
+
+def remove_frame_hook(hook):
+    """Stops calling a hook added with :func:`add_frame_hook`"""
+    PYPOINTS_STATS.hooks.remove(hook)
+
+class StatsOverlay():
+    """Shows the frame rate and the cost of drawing in a corner of the screen
+    
+    :param font: The :class:`Font` of the overlay
+    :type font: :class:`Font`
+    :param cfield: (optional) The field the overlay is shown on. Defaults to the current field
+    :type cfield: int
+    :param corner: (optional) (default ``"top-right"``) One of ``"top-left"``, ``"top-right"``, ``"bottom-left"`` and ``"bottom-right"``
+    :type corner: string
+    :param interval: (optional) (default ``0.5``) Seconds between updates of the overlay
+    :type interval: float
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        overlay = StatsOverlay(Font(Color(black, yellow)))
+    
+    .. seealso:: :func:`frame_stats`
+    """
+    def __init__(self, font, cfield=None, corner="top-right", interval=0.5):
+        self.font = font
+        self.field = field if cfield is None else cfield
+        self.corner = corner
+        self.interval = interval
+        self.last = 0
+        self.text = None
+        add_frame_hook(self.update)
+    
+    def format(self, stats):
+        return "%5.1f fps %6.2f ms %5d pts %4d calls" % (stats["fps"], (stats["run"] + stats["draw"] + stats["refresh"]) * 1000, stats["drawn"], stats["calls"])
+    
+    def update(self, frame):
+        drawn = frame["field"]
+        if (self.field not in drawn if isinstance(drawn, tuple) else drawn != self.field) or frame["time"] - self.last < self.interval:
+            return None
+        self.last = frame["time"]
+        line = self.format(frame_stats())
+        lines, cols = frame["size"]
+        x = 0 if self.corner.endswith("left") else max(cols - len(line) - 1, 0)
+        y = 0 if self.corner.startswith("top") else max(lines - 1, 0)
+        if self.text is not None and (self.text.x, self.text.y) != (x, y):
+            self.text.remove()
+            self.text = None
+        if self.text is None:
+            self.text = Text(x, y, line, self.field, self.font)
+        else:
+            self.text.set_text(line)
+    
+    def remove(self):
+        """Removes the overlay"""
+        remove_frame_hook(self.update)
+        if self.text is not None:
+            self.text.remove()
+
+class Viewport():
+    """A scrollable view of a field. Only the points inside the visible rectangle are visited and drawn,
+    so a field can hold far more rows than the terminal shows
+    
+    :param cfield: The field that is shown
+    :type cfield: int
+    :param x: (optional) (default ``0``) The ``x`` position of the view on the window
+    :type x: int
+    :param y: (optional) (default ``0``) The ``y`` position of the view on the window
+    :type y: int
+    :param width: (optional) The width of the view. Defaults to the rest of the window
+    :type width: int
+    :param height: (optional) The height of the view. Defaults to the rest of the window
+    :type height: int
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        for row in range(100000):
+            Text(0, row, "Row " + str(row), 1, font)
+        view = Viewport(1, 0, 2, 40, 20)
+        view.scroll(0, 500)
+        view.render(win)
+    
+    .. note:: Give the view its own field. The main field drawn by :func:`refresh` is not clipped
+    
+    .. seealso:: :func:`refresh`
+    """
+    def __init__(self, cfield, x=0, y=0, width=None, height=None):
+        self.field = cfield
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.scroll_x = 0
+        self.scroll_y = 0
+        self.renderer = Renderer(PYPOINTS_POINTREGISTRY)
+    
+    def size(self, win):
+        """Returns the ``(width, height)`` of the view on ``win``"""
+        lines, cols = win.getmaxyx()
+        width = cols - self.x if self.width is None else self.width
+        height = lines - self.y if self.height is None else self.height
+        return (max(width, 0), max(height, 0))
+    
+    def scroll(self, dx, dy):
+        """Scrolls the view by ``dx`` columns and ``dy`` rows"""
+        self.scroll_to(self.scroll_x + dx, self.scroll_y + dy)
+    
+    def scroll_to(self, x, y):
+        """Scrolls the view so the cell at ``x``, ``y`` on the field is in its top left corner"""
+        self.scroll_x = x
+        self.scroll_y = y
+    
+    def render(self, win, full=False):
+        """Draws the visible part of the field onto ``win``. Only the cells that changed are written
+        
+        :param full: (optional) (default ``False``) Clear the view and draw every cell
+        :type full: bool
+        """
+        width, height = self.size(win)
+        self.renderer.view((self.scroll_x, self.scroll_y, width, height), (self.x, self.y))
+        self.renderer.render(win, self.field, full)
+    
+    def remove(self):
+        """Stops the view from tracking changes to its field"""
+        PYPOINTS_POINTREGISTRY.watchers.remove(self.renderer)
+
+class Layer():
+    """One layer of a :class:`Compositor`. It shows a field in its own window, and keeps what it drew,
+    so it is only written to when points on its own field change
+    
+    .. warning:: Do not make this class yourself. Use Compositor.\ :func:`~pypoints.Compositor.layer`
+    
+    .. note:: Layers are not transparent. Empty cells of a layer hide the layers below it
+    
+    .. seealso:: :class:`Compositor`
+    """
+    def __init__(self, compositor, cfield, x, y, width, height):
+        self.compositor = compositor
+        self.field = cfield
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.visible = True
+        self.win = None
+        self.panel = None
+        self.renderer = Renderer(PYPOINTS_POINTREGISTRY)
+    
+    def create(self, win):
+        """Makes the window of the layer, sized to fit in ``win``"""
+        lines, cols = win.getmaxyx()
+        self.width = max(cols - self.x if self.width is None else self.width, 1)
+        self.height = max(lines - self.y if self.height is None else self.height, 1)
+        self.renderer.view((0, 0, self.width, self.height))
+        if headless:
+            self.win = HeadlessWindow(self.height, self.width)
+            self.win.touched = set()
+        else:
+            import curses.panel
+            self.win = curses.newwin(self.height, self.width, self.y, self.x)
+            self.panel = curses.panel.new_panel(self.win)
+            if not self.visible:
+                self.panel.hide()
+    
+    def contains(self, x, y):
+        """Returns ``True`` if the cell at ``x``, ``y`` on the screen is covered by the layer"""
+        return self.visible and self.win is not None and self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
+    
+    def damage(self):
+        """Marks the screen under the layer to be composited again"""
+        if self.win is None:
+            return None
+        if self.panel is not None:
+            self.compositor.restack = True
+        else:
+            self.compositor.damage.update((x, y) for y in range(self.y, self.y + self.height) for x in range(self.x, self.x + self.width))
+    
+    def show(self):
+        """Shows the layer"""
+        if not self.visible:
+            self.visible = True
+            self.damage()
+            if self.panel is not None:
+                self.panel.show()
+    
+    def hide(self):
+        """Hides the layer. Its field is still tracked, so showing it again only writes what changed"""
+        if self.visible:
+            self.visible = False
+            self.damage()
+            if self.panel is not None:
+                self.panel.hide()
+    
+    def move(self, x, y):
+        """Moves the layer so its top left corner is at ``x``, ``y`` on the screen. Its content is not redrawn"""
+        self.damage()
+        self.x = x
+        self.y = y
+        self.damage()
+        if self.panel is not None:
+            self.panel.move(y, x)
+    
+    def top(self):
+        """Puts the layer above every other layer"""
+        self.compositor.layers.remove(self)
+        self.compositor.layers.append(self)
+        self.damage()
+        if self.panel is not None:
+            self.panel.top()
+    
+    def bottom(self):
+        """Puts the layer below every other layer"""
+        self.compositor.layers.remove(self)
+        self.compositor.layers.insert(0, self)
+        self.damage()
+        if self.panel is not None:
+            self.panel.bottom()
+    
+    def remove(self):
+        """Removes the layer from its compositor"""
+        self.hide()
+        self.compositor.layers.remove(self)
+        PYPOINTS_POINTREGISTRY.watchers.remove(self.renderer)
+        self.panel = None
+        self.win = None
+
+class Compositor():
+    """Draws several fields at once as stacked layers. Every layer has its own window, on a ``curses.panel``, and its own back buffer.
+    A frame only writes the cells that changed on each layer, so a big static background under a small
+    animated layer costs only the cells of the animated layer
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        screen = Compositor()
+        background = screen.layer(1)
+        bar = screen.layer(2, 10, 20, 60, 1)
+        HLine(0, 60, 0, "-", 2)
+        while True:
+            ...
+            screen.render(win)
+    
+    .. note:: Use Compositor.\ :func:`~pypoints.Compositor.render` instead of :func:`refresh` to draw. Points are placed on the field of a layer at positions relative to the layer
+    
+    .. seealso:: :class:`Layer`, :class:`Viewport`
+    """
+    def __init__(self):
+        self.layers = []
+        self.damage = set()
+        self.restack = False
+    
+    def layer(self, cfield, x=0, y=0, width=None, height=None):
+        """Adds a layer on top of the others and returns it
+        
+        :param cfield: The field shown on the layer
+        :type cfield: int
+        :param x: (optional) (default ``0``) The ``x`` position of the layer on the screen
+        :type x: int
+        :param y: (optional) (default ``0``) The ``y`` position of the layer on the screen
+        :type y: int
+        :param width: (optional) The width of the layer. Defaults to the rest of the screen
+        :type width: int
+        :param height: (optional) The height of the layer. Defaults to the rest of the screen
+        :type height: int
+        :rtype: :class:`Layer`
+        """
+        layer = Layer(self, cfield, x, y, width, height)
+        self.layers.append(layer)
+        return layer
+    
+    def render(self, win, full=False):
+        """Draws the layers that changed onto ``win``
+        
+        :param full: (optional) (default ``False``) Redraw every layer
+        :type full: bool
+        """
+        start = t.perf_counter()
+        visited = 0
+        drawn = 0
+        calls = 0
+        for layer in self.layers:
+            if layer.win is None:
+                layer.create(win)
+            if not layer.visible:
+                continue
+            counts = layer.renderer.draw(layer.win, layer.field, full)
+            if counts is not None:
+                visited += layer.renderer.visited
+                drawn += counts[0]
+                calls += counts[1]
+        if headless:
+            if full:
+                for layer in self.layers:
+                    layer.damage()
+            calls += self.composite(win)
+        end = t.perf_counter()
+        if not calls and not self.restack:
+            return None
+        self.restack = False
+        if headless:
+            win.noutrefresh()
+        else:
+            curses.panel.update_panels()
+            curses.doupdate()
+        refreshed = t.perf_counter()
+        PYPOINTS_STATS.record({"time": refreshed, "field": tuple(i.field for i in self.layers if i.visible), "size": win.getmaxyx(),
+                               "draw": end - start, "refresh": refreshed - end, "visited": visited, "drawn": drawn, "calls": calls + (1 if headless else 2)})
+    
+    def composite(self, win):
+        """Copies the changed cells of the layer windows onto ``win``, for :class:`HeadlessWindow` where there are no panels.
+        Returns the number of calls"""
+        cells = self.damage
+        self.damage = set()
+        for layer in self.layers:
+            if layer.win is None or not layer.win.touched:
+                continue
+            if layer.visible:
+                cells.update((x + layer.x, y + layer.y) for x, y in layer.win.touched)
+            layer.win.touched = set()
+        writes = {}
+        for x, y in cells:
+            glyph = (" ", 0)
+            for layer in reversed(self.layers):
+                if layer.contains(x, y):
+                    glyph = layer.win.cells.get((x - layer.x, y - layer.y), glyph)
+                    break
+            writes[(x, y)] = glyph
+        return _write_runs(win, writes)
+
+class FrameScheduler():
+    """A PyPoints scheduling class that merges redraw requests into at most one frame per ``interval`` seconds
+    
+    .. warning:: Do not use this class. It is an internal usage class only. Use :func:`request_refresh`, :func:`flush` and :func:`set_fps`
+    
+    .. seealso:: :class:`Renderer`, :func:`request_refresh`
+    """
+    def __init__(self, renderer, fps=60):
+        self.renderer = renderer
+        self.interval = 1 / fps
+        self.last = 0
+        self.pending = False
+        self.win = None
+    
+    def request(self, win):
+        self.win = win
+        self.pending = True
+        if t.monotonic() - self.last >= self.interval:
+            self.flush(win)
+    
+    def flush(self, win=None, full=False):
+        if win is None:
+            win = self.win
+            if win is None:
+                return None
+        self.win = win
+        self.pending = False
+        self.last = t.monotonic()
+        PYPOINTS_LAYOUT.check(win)
+        self.renderer.render(win, field, full)
+
+class Paste(str):
+    """Text that was pasted into the terminal. :func:`keys` and :func:`getkey` give a whole paste as one
+    ``Paste`` instead of one key per character. It is a string of the pasted text
+    
+    .. seealso:: :func:`set_paste`
+    """
+    pass
+
+class InputQueue():
+    """A PyPoints input class that reads every waiting key at once and keeps them as a queue of events.
+    Keys are read with ``getch`` until there are none left, utf-8 is decoded, and bracketed pastes become one :class:`Paste`
+    
+    .. warning:: Do not use this class. It is an internal usage class only. Use :func:`keys` and :func:`getkey`
+    
+    .. seealso:: :func:`keys`, :func:`getkey`, :func:`set_paste`
+    """
+    paste_start = "\x1b[200~"
+    paste_end = "\x1b[201~"
+    
+    def __init__(self):
+        self.events = deque()
+        self.decoder = None
+        self.paste = None
+        self.pending = ""
+        self.names = None
+        self.delay = -1
+    
+    def poll(self, win, restore=True):
+        """Reads all waiting input from ``win`` without waiting. Returns the number of events added
+        
+        :param restore: (optional) (default ``True``) Put back the timeout set with :func:`set_timeout` after reading
+        :type restore: bool
+        """
+        codes = []
+        win.nodelay(True)
+        try:
+            while True:
+                code = win.getch()
+                if code == curses.ERR:
+                    break
+                codes.append(code)
+        finally:
+            if restore:
+                win.timeout(self.delay)
+        return self.decode(codes)
+    
+    def wait(self, win):
+        """Waits for input on ``win``, then reads everything else that is waiting"""
+        code = win.getch()
+        return (0 if code == curses.ERR else self.decode([code])) + self.poll(win)
+    
+    def take(self):
+        """Returns and removes every event in the queue"""
+        events = list(self.events)
+        self.events.clear()
+        return events
+    
+    def unread(self, events):
+        """Puts ``events`` back at the front of the queue, for a widget that stopped in the middle of a batch"""
+        self.events.extendleft(reversed(events))
+    
+    def name(self, code):
+        if not headless:
+            return curses.keyname(code).decode("utf-8", "replace")
+        if self.names is None:
+            self.names = {}
+            for name in sorted(dir(curses)):
+                if name.startswith("KEY_") and name not in ("KEY_MIN", "KEY_MAX"):
+                    self.names.setdefault(getattr(curses, name), name)
+        return self.names.get(code, str(code))
+    
+    def decode(self, codes):
+        if self.decoder is None:
+            import codecs
+            self.decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        count = len(self.events)
+        data = bytearray()
+        for code in codes:
+            if 0 <= code < 256:
+                data.append(code)
+                continue
+            self.text(self.decoder.decode(bytes(data)))
+            data = bytearray()
+            if self.paste is None:
+                self.events.append(self.name(code))
+        self.text(self.decoder.decode(bytes(data)))
+        return len(self.events) - count
+    
+    def text(self, text):
+        text = self.pending + text
+        self.pending = ""
+        while text:
+            if self.paste is None:
+                start = text.find(self.paste_start)
+                if start == -1:
+                    self.events.extend(text)
+                    return None
+                self.events.extend(text[:start])
+                self.paste = []
+                text = text[start + len(self.paste_start):]
+            else:
+                end = text.find(self.paste_end)
+                if end == -1:
+                    for size in range(len(self.paste_end) - 1, 0, -1):
+                        if text.endswith(self.paste_end[:size]):
+                            self.pending = text[-size:]
+                            text = text[:-size]
+                            break
+                    self.paste.append(text)
+                    return None
+                self.paste.append(text[:end])
+                self.events.append(Paste("".join(self.paste)))
+                self.paste = None
+                text = text[end + len(self.paste_end):]
+
+class Layout():
+    """A PyPoints layout class that moves anchored objects when the window changes size
+    
+    .. warning:: Do not use this class. It is an internal usage class only. Use :func:`anchor` and :func:`resize`
+    
+    .. seealso:: :func:`anchor`, :func:`resize`
+    """
+    def __init__(self):
+        self.anchors = []
+        self.size = None
+    
+    def check(self, win):
+        """Moves the anchored objects if the size of ``win`` changed since the last check. Returns ``True`` if it changed"""
+        size = win.getmaxyx()
+        if size == self.size:
+            return False
+        if self.size is not None:
+            dy = size[0] - self.size[0]
+            dx = size[1] - self.size[1]
+            for item, right, bottom in self.anchors:
+                item.move(dx if right else 0, dy if bottom else 0)
+            log("Window resized to " + str(size[1]) + "x" + str(size[0]))
+        self.size = size
+        return True
+
 global PYPOINTS_COLORGET
 PYPOINTS_COLORGET = ColorGet()
 
 global PYPOINTS_POINTREGISTRY
 PYPOINTS_POINTREGISTRY = PointRegistry()
 
+global PYPOINTS_RENDERER
+PYPOINTS_RENDERER = Renderer(PYPOINTS_POINTREGISTRY)
+
+global PYPOINTS_SCHEDULER
+PYPOINTS_SCHEDULER = FrameScheduler(PYPOINTS_RENDERER)
+
+global PYPOINTS_STATS
+PYPOINTS_STATS = FrameStats()
+
+global PYPOINTS_LAYOUT
+PYPOINTS_LAYOUT = Layout()
+
+global PYPOINTS_INPUT
+PYPOINTS_INPUT = InputQueue()
+
+global PYPOINTS_ASYNCRUNNER
+PYPOINTS_ASYNCRUNNER = None
+
+global PYPOINTS_TEXTCACHE
+PYPOINTS_TEXTCACHE = OrderedDict()
+
 global PYPOINTS_FONTREGISTRY
 PYPOINTS_FONTREGISTRY = FontRegistry()
 
@@ -184,7 +1613,9 @@ standout = curses.A_STANDOUT
 underline = curses.A_UNDERLINE
 
 log_debug = False
+headless = False
 field = 0
+text_cache_size = 256
 
 class Font():
     """Used to make a :class:`Point` with custom colors and display
@@ -202,18 +1633,46 @@ class Font():
         font = Font(color, bold)
         point = Point("a", 0, 0, 0, font)
     
+    .. note:: Fonts are shared. Making a font with the same color and extra as an existing one returns the existing font
+    
     .. warning:: Do not change ``font.regid``. Blueprints using that font will fail. Keep in mind that the order of the font definition determines its regid. If using blueprints, don't change the order of your fonts
     
     .. seealso:: :class:`Color`, :class:`Point`, :class:`Blueprint`
     """
+    def __new__(cls, color, extra=None):
+        font = PYPOINTS_FONTREGISTRY.fonts.get((color, extra))
+        if font is None:
+            font = object.__new__(cls)
+            font.refs = 0
+        font.refs += 1
+        return font
+    
     def __init__(self, color, extra=None):
+        if self.refs > 1:
+            return None
         self.regid = PYPOINTS_FONTREGISTRY.register(self)
+        PYPOINTS_FONTREGISTRY.fonts[(color, extra)] = self
         self.color = color
         self.extra = extra
+        pair = color.value << 8 if headless else curses.color_pair(color.value)
         if extra is not None:
-            self.value = curses.color_pair(color.value) | extra
+            self.value = pair | extra
         else:
-            self.value = curses.color_pair(color.value)
+            self.value = pair
+    
+    def __reduce__(self):
+        return (Font, (self.color, self.extra))
+    
+    def release(self):
+        """Gives up one use of the font. Once every ``Font(...)`` call that returned it is released, its regid is freed for new fonts
+        
+        .. warning:: Do not release a font that is still used by points or blueprints
+        """
+        self.refs -= 1
+        if self.refs == 0:
+            del PYPOINTS_FONTREGISTRY.fonts[(self.color, self.extra)]
+            PYPOINTS_FONTREGISTRY.release(self)
+            log("Released font " + str(self.regid))
     
     def export(self):
         """Exports font to file "font<regid>.pk" as a pickle file. It can be unpickled with the pickle module. 
@@ -228,6 +1687,7 @@ class Font():
         
         .. seealso:: :class:`FontRegistry`
         """
+        import pickle as p
         with open("font" + str(self.regid) + ".pk", "wb") as f:
             p.dump(self, f, p.HIGHEST_PROTOCOL)
 
@@ -245,14 +1705,42 @@ class Color():
     
         color = Color(black, yellow)
     
+    .. note:: Colors are shared. Making a color with the same ``fg`` and ``bg`` as an existing one returns the existing color, so no curses color pair is wasted
+    
     .. seealso:: :class:`Font`
     """
+    def __new__(cls, fg, bg):
+        color = PYPOINTS_COLORGET.colors.get((fg, bg))
+        if color is None:
+            color = object.__new__(cls)
+            color.refs = 0
+        color.refs += 1
+        return color
+    
     def __init__(self, fg, bg):
+        if self.refs > 1:
+            return None
         self.fg = fg
         self.bg = bg
         self.value = PYPOINTS_COLORGET.get()
+        PYPOINTS_COLORGET.colors[(fg, bg)] = self
         log("Setting color " + str(self.value))
-        curses.init_pair(self.value, fg, bg)
+        if not headless:
+            curses.init_pair(self.value, fg, bg)
+    
+    def __reduce__(self):
+        return (Color, (self.fg, self.bg))
+    
+    def release(self):
+        """Gives up one use of the color. Once every ``Color(...)`` call that returned it is released, its curses color pair is reused for new colors
+        
+        .. warning:: Do not release a color that is still used by a font
+        """
+        self.refs -= 1
+        if self.refs == 0:
+            del PYPOINTS_COLORGET.colors[(self.fg, self.bg)]
+            PYPOINTS_COLORGET.release(self.value)
+            log("Released color " + str(self.value))
 
 class Point():
     """The core foundation of the PyPoints module. It is a single character on the terminal window.
@@ -280,15 +1768,92 @@ class Point():
     
     .. warning:: More than one character on parameter ``char`` will break PyPoints. Please use :class:`Text` for multi-character points.
     """
+    __slots__ = ("_char", "_font", "_x", "_y", "_field", "activated", "regid")
+    
     def __init__(self, char, x, y, cfield, font=None, active=True):
-        self.char = char
-        self.font = font
-        self.x = x
-        self.y = y
-        self.field = cfield
+        self._char = char
+        self._font = font
+        self._x = x
+        self._y = y
+        self._field = cfield
         self.activated = active
         if active:
             self.regid = PYPOINTS_POINTREGISTRY.register(self)
+    
+    @property
+    def char(self):
+        return self._char
+    
+    @char.setter
+    def char(self, value):
+        self._char = value
+        self._changed(self._field, self._x, self._y)
+    
+    @property
+    def font(self):
+        return self._font
+    
+    @font.setter
+    def font(self, value):
+        self._font = value
+        self._changed(self._field, self._x, self._y)
+    
+    @property
+    def x(self):
+        return self._x
+    
+    @x.setter
+    def x(self, value):
+        old = (self._field, self._x, self._y)
+        self._x = value
+        self._moved(*old)
+    
+    @property
+    def y(self):
+        return self._y
+    
+    @y.setter
+    def y(self, value):
+        old = (self._field, self._x, self._y)
+        self._y = value
+        self._moved(*old)
+    
+    @property
+    def field(self):
+        return self._field
+    
+    @field.setter
+    def field(self, value):
+        old = (self._field, self._x, self._y)
+        self._field = value
+        self._moved(*old)
+    
+    def move(self, dx, dy):
+        """Moves the point by ``dx`` columns and ``dy`` rows"""
+        old = (self._field, self._x, self._y)
+        self._x += dx
+        self._y += dy
+        self._moved(*old)
+    
+    def _changed(self, cfield, x, y):
+        """Invalidates the cell of the point so the :class:`Renderer` redraws it"""
+        if self.activated:
+            PYPOINTS_POINTREGISTRY.invalidate(cfield, x, y)
+    
+    def _moved(self, cfield, x, y):
+        """Moves the point in the :class:`PointRegistry` index from its old cell to the current one"""
+        if self.activated:
+            PYPOINTS_POINTREGISTRY.move(self, cfield, x, y)
+    
+    def glyph(self, x, y):
+        """Returns the ``(char, attr)`` drawn at cell ``x``, ``y``, or ``None`` if the point is not there"""
+        if x == self._x and y == self._y:
+            return (self._char, 0 if self._font is None else self._font.value)
+        return None
+    
+    def cells(self):
+        """Returns the cells of the point as ``(x, y, char, attr)``. Used by :class:`Renderer`"""
+        return ((self._x, self._y, self._char, 0 if self._font is None else self._font.value),)
         
     def draw(self, win):
         """This method is used by :class:`PointRegistry` and :func:`Run`.
@@ -320,17 +1885,442 @@ class Point():
         
         .. warning:: This action is irreversable
         """
-        log("Removed point " + str(self.regid), True)
+        if not self.activated:
+            return None
+        PYPOINTS_LOGGER.debug("Removed point %d", self.regid)
         PYPOINTS_POINTREGISTRY.remove(self)
+        self.activated = False
         if kill:
             del(self)
+
+class PointBuffer():
+    """A compact group of points on one field. The characters, positions and font ids are kept in ``array`` columns
+    instead of one :class:`Point` object per character, so big shapes take little memory and are quick to build.
+    Positions are relative to ``x`` and ``y``
     
-    def __del__(self):
-        """Runs ``Point.remove()``"""
-        try:
-            self.remove()
-        except Exception:
-            pass
+    :param x: The ``x`` position the points are relative to
+    :type x: int
+    :param y: The ``y`` position the points are relative to
+    :type y: int
+    :param cfield: The field that the points are displayed on
+    :type cfield: int
+    :param active: (optional) (default ``True``) If ``active`` is ``False``, then the buffer is not registered, and therefore not displayed. Use PointBuffer.\ :func:`~pypoints.PointBuffer.activate` to register and display it
+    :type active: bool
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        buffer = PointBuffer(3, 5, 0)
+        buffer.append("a", 0, 0, font)
+        buffer.extend("bcd", [1, 2, 3], [0, 0, 0])
+    
+    .. note:: Iterating over a buffer gives unregistered :class:`Point` copies of its points
+    
+    .. seealso:: :class:`Point`, :class:`Shape`, :class:`HLine`, :class:`VLine`
+    """
+    def __init__(self, x, y, cfield, active=True):
+        self.x = x
+        self.y = y
+        self.field = cfield
+        self.chars = array("I")
+        self.xs = array("i")
+        self.ys = array("i")
+        self.fonts = array("i")
+        self.lookup = None
+        self.shared = None
+        self._bounds = None
+        self.activated = False
+        if active:
+            self.activate()
+    
+    def share(self, source):
+        """Uses the columns of ``source``, a :class:`CompiledBlueprint`, instead of copying them.
+        They are copied the first time the buffer is changed"""
+        self.chars = source.chars
+        self.xs = source.xs
+        self.ys = source.ys
+        self.fonts = source.fonts
+        self.lookup = source.lookup
+        self.shared = source
+        self._resized(0)
+    
+    def _own(self):
+        if self.shared is not None:
+            self.chars = array("I", self.chars)
+            self.xs = array("i", self.xs)
+            self.ys = array("i", self.ys)
+            self.fonts = array("i", self.fonts)
+            self.lookup = None
+            self.shared = None
+    
+    def __len__(self):
+        return len(self.chars)
+    
+    def __getitem__(self, i):
+        font = self.fonts[i]
+        return Point(chr(self.chars[i]), self.x + self.xs[i], self.y + self.ys[i], self.field, None if font == -1 else PYPOINTS_FONTREGISTRY.get(font), False)
+    
+    def __iter__(self):
+        for i in range(len(self.chars)):
+            yield self[i]
+    
+    def append(self, char, x, y, font=None):
+        """Adds one point at ``x``, ``y`` relative to the buffer
+        
+        :param char: The character of the point
+        :type char: string
+        :param font: (optional) The :class:`Font` of the point
+        :type font: :class:`Font`
+        """
+        self.extend(char, (x,), (y,), font)
+    
+    def extend(self, chars, xs, ys, font=None):
+        """Adds one point for each character in ``chars``
+        
+        :param chars: The characters of the points
+        :type chars: string
+        :param xs: The ``x`` position of each point, relative to the buffer
+        :type xs: iterable of int
+        :param ys: The ``y`` position of each point, relative to the buffer
+        :type ys: iterable of int
+        :param font: (optional) A :class:`Font` used for every point, or an iterable of font regids where ``-1`` is no font
+        :type font: :class:`Font` or iterable of int
+        """
+        self._own()
+        start = len(self.chars)
+        self.chars.extend(map(ord, chars))
+        self.xs.extend(xs)
+        self.ys.extend(ys)
+        if font is None or isinstance(font, Font):
+            self.fonts.extend(array("i", (-1 if font is None else font.regid,)) * (len(self.chars) - start))
+        else:
+            self.fonts.extend(font)
+        self._resized(start)
+    
+    def update(self, chars, xs, ys, font=None):
+        """Replaces the points of the buffer, only touching the cells that changed. Points are compared
+        by index, so points are only added or removed at the end of the buffer
+        
+        :param chars: The new characters
+        :type chars: string
+        :param xs: The ``x`` position of each point, relative to the buffer
+        :type xs: iterable of int
+        :param ys: The ``y`` position of each point, relative to the buffer
+        :type ys: iterable of int
+        :param font: (optional) A :class:`Font` used for every point, or an iterable of font regids where ``-1`` is no font
+        :type font: :class:`Font` or iterable of int
+        """
+        chars = array("I", map(ord, chars))
+        xs = array("i", xs)
+        ys = array("i", ys)
+        if font is None or isinstance(font, Font):
+            fonts = array("i", (-1 if font is None else font.regid,)) * len(chars)
+        else:
+            fonts = array("i", font)
+        if chars == self.chars and xs == self.xs and ys == self.ys and fonts == self.fonts:
+            return None
+        self._own()
+        old = len(self.chars)
+        same = min(old, len(chars))
+        changed = []
+        moved = False
+        for i in range(same):
+            if xs[i] != self.xs[i] or ys[i] != self.ys[i]:
+                changed.append((self.xs[i], self.ys[i]))
+                moved = True
+            elif chars[i] == self.chars[i] and fonts[i] == self.fonts[i]:
+                continue
+            changed.append((xs[i], ys[i]))
+        for i in range(same, old):
+            changed.append((self.xs[i], self.ys[i]))
+        for i in range(same, len(chars)):
+            changed.append((xs[i], ys[i]))
+        
+        self.chars = chars
+        self.xs = xs
+        self.ys = ys
+        self.fonts = fonts
+        if moved or old != len(chars):
+            self.lookup = None
+            self._bounds = None
+            if self.activated:
+                PYPOINTS_POINTREGISTRY.reindex(self)
+        if self.activated:
+            for cell in changed:
+                PYPOINTS_POINTREGISTRY.invalidate(self.field, self.x + cell[0], self.y + cell[1])
+    
+    def move(self, dx, dy):
+        """Moves the whole buffer by ``dx`` columns and ``dy`` rows. Only ``x`` and ``y`` change,
+        so the cost is redrawing the cells, not rebuilding the points"""
+        if self.activated:
+            PYPOINTS_POINTREGISTRY.invalidate_all(self)
+        self.x += dx
+        self.y += dy
+        self._bounds = None
+        if self.activated:
+            PYPOINTS_POINTREGISTRY.reindex(self)
+            PYPOINTS_POINTREGISTRY.invalidate_all(self)
+    
+    def _resized(self, start):
+        if self.shared is None:
+            self.lookup = None
+        self._bounds = None
+        if self.activated:
+            PYPOINTS_POINTREGISTRY.reindex(self)
+            for i in range(start, len(self.chars)):
+                PYPOINTS_POINTREGISTRY.invalidate(self.field, self.x + self.xs[i], self.y + self.ys[i])
+    
+    def bounds(self):
+        """Returns the rectangle covered by the buffer as ``(x0, y0, x1, y1)``, or ``None`` if it is empty"""
+        if self._bounds is None and self.chars:
+            self._bounds = (self.x + min(self.xs), self.y + min(self.ys), self.x + max(self.xs) + 1, self.y + max(self.ys) + 1)
+        return self._bounds
+    
+    def glyph(self, x, y):
+        """Returns the ``(char, attr)`` drawn at cell ``x``, ``y``, or ``None`` if no point of the buffer is there"""
+        if self.lookup is None:
+            self.lookup = {cell: i for i, cell in enumerate(zip(self.xs, self.ys))}
+            if self.shared is not None:
+                self.shared.lookup = self.lookup
+        i = self.lookup.get((x - self.x, y - self.y))
+        if i is None:
+            return None
+        font = self.fonts[i]
+        return (chr(self.chars[i]), 0 if font == -1 else PYPOINTS_FONTREGISTRY.get(font).value)
+    
+    def cells(self):
+        """Yields the cells of the buffer as ``(x, y, char, attr)``. Used by :class:`Renderer`"""
+        x = self.x
+        y = self.y
+        attrs = {-1: 0}
+        for char, dx, dy, font in zip(self.chars, self.xs, self.ys, self.fonts):
+            attr = attrs.get(font)
+            if attr is None:
+                attr = attrs[font] = PYPOINTS_FONTREGISTRY.get(font).value
+            yield (x + dx, y + dy, chr(char), attr)
+    
+    def activate(self):
+        """Activate, display, and register the buffer if ``active`` was ``False``"""
+        if not self.activated:
+            self.regid = PYPOINTS_POINTREGISTRY.register(self)
+            self.activated = True
+    
+    def remove(self, kill=False):
+        """Removes the buffer from the registry
+        
+        :param kill: (optional) (default ``False``) Deletes the buffer
+        :type kill: bool
+        """
+        if self.activated:
+            PYPOINTS_POINTREGISTRY.remove(self)
+            self.activated = False
+        if kill:
+            del(self)
+
+class Canvas():
+    """A rectangle of cells that is changed in bulk, for heatmaps, plots and other screens that change often.
+    The characters and font ids are kept in two flat ``array`` columns, row by row, instead of one :class:`Point` object per cell.
+    Only the cells whose character or font changed are redrawn
+    
+    :param x: The ``x`` position of the top left cell
+    :type x: int
+    :param y: The ``y`` position of the top left cell
+    :type y: int
+    :param width: The number of columns
+    :type width: int
+    :param height: The number of rows
+    :type height: int
+    :param cfield: The field that the canvas is displayed on
+    :type cfield: int
+    :param font: (optional) The :class:`Font` used when no font is given to Canvas.\ :func:`~pypoints.Canvas.blit`, :func:`~pypoints.Canvas.fill` or :func:`~pypoints.Canvas.set`
+    :type font: :class:`Font`
+    :param active: (optional) (default ``True``) If ``active`` is ``False``, then the canvas is not registered, and therefore not displayed. Use Canvas.\ :func:`~pypoints.Canvas.activate` to register and display it
+    :type active: bool
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        canvas = Canvas(0, 0, 200, 50, 0, font)
+        canvas.fill(".")
+        canvas.blit(["#  #", " ## "], 10, 5)
+        canvas.blit(heat, 0, 0, font=heat_fonts)  # NumPy arrays of codepoints and font regids
+    
+    .. note:: Cells with the character code ``0`` are empty and show the points below them. NumPy arrays are used when they are given, but NumPy is not needed
+    
+    .. seealso:: :class:`PointBuffer`, :class:`Font`
+    """
+    def __init__(self, x, y, width, height, cfield, font=None, active=True):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.field = cfield
+        self.font = font
+        self.chars = array("I", (0,)) * (width * height)
+        self.fonts = array("i", (-1,)) * (width * height)
+        self.activated = False
+        if active:
+            self.activate()
+    
+    def _column(self, values, typecode):
+        if isinstance(values, str):
+            return array(typecode, map(ord, values))
+        if hasattr(values, "astype"):
+            column = array(typecode)
+            if values.dtype.kind == "U":
+                values = values.astype("=U1").view("=u4")
+            column.frombytes(values.astype("=u4" if typecode == "I" else "=i4").tobytes())
+            return column
+        return array(typecode, values)
+    
+    def _fonts(self, font, length):
+        if font is None:
+            font = self.font
+        if font is None or isinstance(font, Font):
+            return array("i", (-1 if font is None else font.regid,)) * length
+        return self._column(font, "i")
+    
+    def blit(self, chars, x=0, y=0, width=None, font=None):
+        """Writes a block of characters with its top left corner at ``x``, ``y`` relative to the canvas.
+        Cells outside the canvas are cut off
+        
+        :param chars: The characters, row after row. A string, a list of row strings, an iterable of codepoints, or a 1 or 2 dimensional NumPy array of codepoints or characters
+        :type chars: string, list of string, iterable of int or NumPy array
+        :param width: (optional) The number of columns in the block. Defaults to the length of the rows, the columns of the NumPy array, or the width of the canvas
+        :type width: int
+        :param font: (optional) A :class:`Font` for every cell, or the font regid of each cell, where ``-1`` is no font
+        :type font: :class:`Font` or iterable of int
+        """
+        if isinstance(chars, list) and chars and isinstance(chars[0], str):
+            width = len(chars[0]) if width is None else width
+            chars = "".join(chars)
+        elif width is None and len(getattr(chars, "shape", ())) == 2:
+            width = chars.shape[1]
+        if width is None:
+            width = self.width
+        chars = self._column(chars, "I")
+        fonts = self._fonts(font, len(chars))
+        if width <= 0:
+            raise ValueError("width must be greater than 0")
+        if len(fonts) != len(chars):
+            raise ValueError("font must have one regid for every character")
+        changed = []
+        left = max(x, 0)
+        right = min(x + width, self.width)
+        if left >= right:
+            return None
+        for row in range(max(-y, 0), min((len(chars) + width - 1) // width, self.height - y)):
+            start = row * width + left - x
+            end = min(row * width + right - x, len(chars))
+            new = chars[start:end]
+            newfonts = fonts[start:end]
+            at = (y + row) * self.width + left
+            if new == self.chars[at:at + len(new)] and newfonts == self.fonts[at:at + len(new)]:
+                continue
+            cx = self.x + left
+            cy = self.y + y + row
+            changed.extend((cx + i, cy) for i, cell in enumerate(zip(new, newfonts, self.chars[at:at + len(new)], self.fonts[at:at + len(new)]))
+                           if cell[0] != cell[2] or cell[1] != cell[3])
+            self.chars[at:at + len(new)] = new
+            self.fonts[at:at + len(new)] = newfonts
+        if self.activated and changed:
+            PYPOINTS_POINTREGISTRY.invalidate_many(self.field, changed)
+    
+    def set(self, x, y, char, font=None):
+        """Sets the cell at ``x``, ``y`` relative to the canvas
+        
+        :param char: The character of the cell
+        :type char: string
+        :param font: (optional) The :class:`Font` of the cell
+        :type font: :class:`Font`
+        """
+        self.blit(char, x, y, 1, font)
+    
+    def fill(self, char, font=None, x=0, y=0, width=None, height=None):
+        """Fills a rectangle of the canvas with ``char``. Defaults to the whole canvas
+        
+        :param char: The character of the cells
+        :type char: string
+        :param font: (optional) The :class:`Font` of the cells
+        :type font: :class:`Font`
+        :param width: (optional) The width of the rectangle. Defaults to the rest of the canvas
+        :type width: int
+        :param height: (optional) The height of the rectangle. Defaults to the rest of the canvas
+        :type height: int
+        """
+        width = self.width - x if width is None else width
+        height = self.height - y if height is None else height
+        if width > 0 and height > 0:
+            self.blit(array("I", (ord(char),)) * (width * height), x, y, width, font)
+    
+    def clear(self):
+        """Empties every cell of the canvas"""
+        self.blit(array("I", (0,)) * len(self.chars), 0, 0, self.width, array("i", (-1,)) * len(self.chars))
+    
+    def move(self, dx, dy):
+        """Moves the canvas by ``dx`` columns and ``dy`` rows"""
+        if self.activated:
+            PYPOINTS_POINTREGISTRY.invalidate_all(self)
+        self.x += dx
+        self.y += dy
+        if self.activated:
+            PYPOINTS_POINTREGISTRY.reindex(self)
+            PYPOINTS_POINTREGISTRY.invalidate_all(self)
+    
+    def rows(self):
+        """Returns the canvas as a list of row strings, with spaces for empty cells"""
+        width = self.width
+        return ["".join(map(chr, self.chars[i:i + width])).replace("\0", " ") for i in range(0, len(self.chars), width)]
+    
+    def bounds(self):
+        """Returns the rectangle covered by the canvas as ``(x0, y0, x1, y1)``, or ``None`` if it has no cells"""
+        if not self.chars:
+            return None
+        return (self.x, self.y, self.x + self.width, self.y + self.height)
+    
+    def glyph(self, x, y):
+        """Returns the ``(char, attr)`` drawn at cell ``x``, ``y``, or ``None`` if the cell is empty"""
+        x -= self.x
+        y -= self.y
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        i = y * self.width + x
+        char = self.chars[i]
+        if not char:
+            return None
+        font = self.fonts[i]
+        return (chr(char), 0 if font == -1 else PYPOINTS_FONTREGISTRY.get(font).value)
+    
+    def cells(self):
+        """Yields the cells of the canvas that are not empty as ``(x, y, char, attr)``. Used by :class:`Renderer`"""
+        width = self.width
+        attrs = {-1: 0}
+        for i, (char, font) in enumerate(zip(self.chars, self.fonts)):
+            if char:
+                attr = attrs.get(font)
+                if attr is None:
+                    attr = attrs[font] = PYPOINTS_FONTREGISTRY.get(font).value
+                yield (self.x + i % width, self.y + i // width, chr(char), attr)
+    
+    def activate(self):
+        """Activate, display, and register the canvas if ``active`` was ``False``"""
+        if not self.activated:
+            self.regid = PYPOINTS_POINTREGISTRY.register(self)
+            self.activated = True
+    
+    def remove(self, kill=False):
+        """Removes the canvas from the registry
+        
+        :param kill: (optional) (default ``False``) Deletes the canvas
+        :type kill: bool
+        """
+        if self.activated:
+            PYPOINTS_POINTREGISTRY.remove(self)
+            self.activated = False
+        if kill:
+            del(self)
 
 class HLine():
     """Makes a horizontal line
@@ -362,18 +2352,26 @@ class HLine():
         self.ex = ex
         self.char = char
         self.field = cfield
-        self.points = []
         self.font = font
         
-        self.points = []
+        self.points = None
         self.build()
         log("Made horizonal line")
     
     def build(self):
         """There is no need to use this method. It is run automatically
         """
-        for i in range(self.sx, self.ex):
-            self.points.append(Point(self.char, i, self.y, self.field, self.font))
+        length = max(self.ex - self.sx, 0)
+        self.points = PointBuffer(self.sx, self.y, self.field, False)
+        self.points.extend(self.char * length, range(length), array("i", (0,)) * length, self.font)
+        self.points.activate()
+    
+    def move(self, dx, dy):
+        """Moves the line by ``dx`` columns and ``dy`` rows"""
+        self.sx += dx
+        self.ex += dx
+        self.y += dy
+        self.points.move(dx, dy)
     
     def remove(self, kill=False):
         """Removes all points in the line
@@ -386,8 +2384,7 @@ class HLine():
         .. seealso:: ``Point.``\ :func:`~pypoints.Point.remove`
         """
         log("Removed line")
-        for i in self.points:
-            i.remove(kill)
+        self.points.remove()
         if kill:
             del(self)
 
@@ -424,15 +2421,24 @@ t of the points in the line
         self.field = cfield
         self.font = font
         
-        self.points = []
+        self.points = None
         self.build()
         log("Made verticle line")
     
     def build(self):
         """There is no need to use this method. It is run automatically
         """
-        for i in range(self.sy, self.ey):
-            self.points.append(Point(self.char, self.x, i, self.field, self.font))
+        length = max(self.ey - self.sy, 0)
+        self.points = PointBuffer(self.x, self.sy, self.field, False)
+        self.points.extend(self.char * length, array("i", (0,)) * length, range(length), self.font)
+        self.points.activate()
+    
+    def move(self, dx, dy):
+        """Moves the line by ``dx`` columns and ``dy`` rows"""
+        self.x += dx
+        self.sy += dy
+        self.ey += dy
+        self.points.move(dx, dy)
     
     def remove(self, kill=False):
         """Removes all points in the line
@@ -445,21 +2451,269 @@ t of the points in the line
         .. seealso:: ``Point.``\ :func:`~pypoints.Point.remove`
         """
         log("Removed line")
-        for i in self.points:
-            i.remove(kill)
+        self.points.remove()
         if kill:
             del(self)
 
-#class RectangleBluprint():
-#    def __init__(self, tpch, tpf, bmch, bmf, lch, lf, rch, rf):
-#        self.tpch = tpch
-#        self.tpf = tpf
-#        self.bmch = bmch
-#        self.bmf = bmf
-#        self.lch = lch
-#        self.lf = lf
-#        self.rch = rch
-#        self.rf = rf
+class Geometry():
+    """The base of :class:`Line`, :class:`Rect` and :class:`Box`. A geometry keeps only its corners and characters,
+    and makes its cells when they are drawn, so moving or resizing it does not build any points
+    
+    .. warning:: Do not use this class. It is an internal usage class only
+    """
+    def __init__(self, cfield, font, active):
+        self.field = cfield
+        self.font = font
+        self.activated = False
+        if active:
+            self.activate()
+    
+    def change(self, **values):
+        """Changes any attributes of the shape at once, and redraws only the cells it covered before and after
+        
+        :Example:
+        
+        .. code-block:: python
+        
+            line.change(ex=40, ey=12, char="*")
+        """
+        if self.activated:
+            PYPOINTS_POINTREGISTRY.invalidate_all(self)
+        for key, value in values.items():
+            setattr(self, key, value)
+        if self.activated:
+            PYPOINTS_POINTREGISTRY.reindex(self)
+            PYPOINTS_POINTREGISTRY.invalidate_all(self)
+    
+    def attr(self):
+        return 0 if self.font is None else self.font.value
+    
+    def activate(self):
+        """Activate, display, and register the shape if ``active`` was ``False``"""
+        if not self.activated:
+            self.regid = PYPOINTS_POINTREGISTRY.register(self)
+            self.activated = True
+    
+    def remove(self, kill=False):
+        """Removes the shape from the registry
+        
+        :param kill: (optional) (default ``False``) Deletes the shape
+        :type kill: bool
+        """
+        if self.activated:
+            PYPOINTS_POINTREGISTRY.remove(self)
+            self.activated = False
+        if kill:
+            del(self)
+
+class Line(Geometry):
+    """Makes a straight line between any two cells, at any angle
+    
+    :param sx: Start ``x``
+    :type sx: int
+    :param sy: Start ``y``
+    :type sy: int
+    :param ex: End ``x``. The end cell is part of the line
+    :type ex: int
+    :param ey: End ``y``
+    :type ey: int
+    :param char: The character that the line consists of
+    :type char: string
+    :param cfield: The field the line appears
+    :type cfield: int
+    :param font: (optional) The font of the line
+    :type font: :class:`Font`
+    :param active: (optional) (default ``True``) If ``active`` is ``False``, then the line is not registered, and therefore not displayed
+    :type active: bool
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        line = Line(0, 0, 30, 10, "*", 0)
+        line.move(2, 0)
+    
+    .. seealso:: :class:`HLine`, :class:`VLine`, :class:`Rect`
+    """
+    def __init__(self, sx, sy, ex, ey, char, cfield, font=None, active=True):
+        self.sx = sx
+        self.sy = sy
+        self.ex = ex
+        self.ey = ey
+        self.char = char
+        Geometry.__init__(self, cfield, font, active)
+    
+    def move(self, dx, dy):
+        """Moves the line by ``dx`` columns and ``dy`` rows"""
+        self.change(sx=self.sx + dx, sy=self.sy + dy, ex=self.ex + dx, ey=self.ey + dy)
+    
+    def bounds(self):
+        """Returns the rectangle covered by the line as ``(x0, y0, x1, y1)``"""
+        return (min(self.sx, self.ex), min(self.sy, self.ey), max(self.sx, self.ex) + 1, max(self.sy, self.ey) + 1)
+    
+    def glyph(self, x, y):
+        """Returns the ``(char, attr)`` drawn at cell ``x``, ``y``, or ``None`` if the line does not cover it"""
+        dx = self.ex - self.sx
+        dy = self.ey - self.sy
+        steps = max(abs(dx), abs(dy))
+        if abs(dx) >= abs(dy):
+            i = (x - self.sx) * (1 if dx >= 0 else -1)
+            if 0 <= i <= steps and y == self.sy + _step(dy, i, steps):
+                return (self.char, self.attr())
+        else:
+            i = (y - self.sy) * (1 if dy >= 0 else -1)
+            if 0 <= i <= steps and x == self.sx + _step(dx, i, steps):
+                return (self.char, self.attr())
+        return None
+    
+    def cells(self):
+        """Yields the cells of the line as ``(x, y, char, attr)``. Used by :class:`Renderer`"""
+        dx = self.ex - self.sx
+        dy = self.ey - self.sy
+        steps = max(abs(dx), abs(dy))
+        attr = self.attr()
+        for i in range(steps + 1):
+            yield (self.sx + _step(dx, i, steps), self.sy + _step(dy, i, steps), self.char, attr)
+
+def _step(delta, i, steps):
+    """Returns ``delta * i / steps`` rounded to the nearest cell, with halves rounded away from the start"""
+    if not steps:
+        return 0
+    if delta < 0:
+        return -((2 * i * -delta + steps) // (2 * steps))
+    return (2 * i * delta + steps) // (2 * steps)
+
+class Rect(Geometry):
+    """Makes a rectangle, either an outline or filled
+    
+    :param x: The ``x`` position of the top left corner
+    :type x: int
+    :param y: The ``y`` position of the top left corner
+    :type y: int
+    :param width: The width of the rectangle
+    :type width: int
+    :param height: The height of the rectangle
+    :type height: int
+    :param char: The character that the rectangle consists of
+    :type char: string
+    :param cfield: The field the rectangle appears
+    :type cfield: int
+    :param font: (optional) The font of the rectangle
+    :type font: :class:`Font`
+    :param filled: (optional) (default ``False``) Fill the inside of the rectangle with ``char`` too
+    :type filled: bool
+    :param active: (optional) (default ``True``) If ``active`` is ``False``, then the rectangle is not registered, and therefore not displayed
+    :type active: bool
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        rect = Rect(2, 2, 20, 5, "#", 0)
+        rect.resize(30, 8)
+    
+    .. seealso:: :class:`Box`, :class:`Line`
+    """
+    def __init__(self, x, y, width, height, char, cfield, font=None, filled=False, active=True):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.char = char
+        self.filled = filled
+        Geometry.__init__(self, cfield, font, active)
+    
+    def move(self, dx, dy):
+        """Moves the rectangle by ``dx`` columns and ``dy`` rows"""
+        self.change(x=self.x + dx, y=self.y + dy)
+    
+    def resize(self, width, height):
+        """Changes the size of the rectangle, keeping its top left corner in place"""
+        self.change(width=width, height=height)
+    
+    def part(self, left, right, top, bottom):
+        """Returns the character of a cell from which edges it is on, or ``None`` for an empty cell"""
+        if left or right or top or bottom or self.filled:
+            return self.char
+        return None
+    
+    def bounds(self):
+        """Returns the rectangle covered as ``(x0, y0, x1, y1)``, or ``None`` if it has no size"""
+        if self.width <= 0 or self.height <= 0:
+            return None
+        return (self.x, self.y, self.x + self.width, self.y + self.height)
+    
+    def glyph(self, x, y):
+        """Returns the ``(char, attr)`` drawn at cell ``x``, ``y``, or ``None`` if the rectangle does not cover it"""
+        x -= self.x
+        y -= self.y
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        char = self.part(x == 0, x == self.width - 1, y == 0, y == self.height - 1)
+        if char is None:
+            return None
+        return (char, self.attr())
+    
+    def cells(self):
+        """Yields the cells of the rectangle as ``(x, y, char, attr)``. Used by :class:`Renderer`"""
+        if self.bounds() is None:
+            return None
+        attr = self.attr()
+        last = self.width - 1
+        inside = self.part(False, False, False, False) is not None
+        for y in range(self.height):
+            edge = y == 0 or y == self.height - 1
+            columns = range(self.width) if edge or inside else (0, last) if last else (0,)
+            for x in columns:
+                char = self.part(x == 0, x == last, y == 0, y == self.height - 1)
+                if char is not None:
+                    yield (self.x + x, self.y + y, char, attr)
+
+class Box(Rect):
+    """Makes a box with box drawing lines and corners, like the border of :class:`MenuBox`
+    
+    :param x: The ``x`` position of the top left corner
+    :type x: int
+    :param y: The ``y`` position of the top left corner
+    :type y: int
+    :param width: The width of the box, borders included
+    :type width: int
+    :param height: The height of the box, borders included
+    :type height: int
+    :param cfield: The field the box appears
+    :type cfield: int
+    :param font: (optional) The font of the box
+    :type font: :class:`Font`
+    :param fill: (optional) A character to fill the inside of the box with. ``" "`` hides the points behind the box
+    :type fill: string
+    :param chars: (optional) (default ``"┌┐└┘─│"``) The top left, top right, bottom left and bottom right corners, and the horizontal and vertical edges
+    :type chars: string
+    :param active: (optional) (default ``True``) If ``active`` is ``False``, then the box is not registered, and therefore not displayed
+    :type active: bool
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        box = Box(0, 0, 200, 10, 0, fill=" ")
+    
+    .. seealso:: :class:`Rect`, :class:`MenuBox`
+    """
+    def __init__(self, x, y, width, height, cfield, font=None, fill=None, chars="┌┐└┘─│", active=True):
+        self.fill = fill
+        self.chars = chars
+        Rect.__init__(self, x, y, width, height, None, cfield, font, False, active)
+    
+    def part(self, left, right, top, bottom):
+        if top or bottom:
+            if left:
+                return self.chars[0 if top else 2]
+            if right:
+                return self.chars[1 if top else 3]
+            return self.chars[4]
+        if left or right:
+            return self.chars[5]
+        return self.fill
 
 class Blueprint():
     """Allows you to draw custom objects and fully customize objects like :class:`MenuBox` and :class:`Text`. It uses a json file or string to load the Blueprint. Can drawn with :class:`Shape`
@@ -470,6 +2724,7 @@ class Blueprint():
     :type nofile: bool
     """
     def __init__(self, file, nofile=False):
+        import json
         if not nofile:
             with open(file, "r") as f:
                 self.data = json.loads(f.read())
@@ -478,18 +2733,550 @@ class Blueprint():
         log("Loaded blueprint")
         
         self.type = self.data[0]
+        self.compiled = None
+    
+    @classmethod
+    def from_compiled(cls, compiled):
+        """Makes a ``custom`` blueprint straight from a :class:`CompiledBlueprint`, without any json.
+        Its ``data`` is only built if it is used
+        
+        :param compiled: The compiled blueprint
+        :type compiled: :class:`CompiledBlueprint`
+        :rtype: :class:`Blueprint`
+        """
+        blueprint = cls.__new__(cls)
+        blueprint._data = None
+        blueprint.type = "custom"
+        blueprint.compiled = compiled
+        return blueprint
+    
+    @classmethod
+    def from_binary(cls, file, rect=None):
+        """Loads a blueprint saved with Blueprint.\ :func:`~pypoints.Blueprint.save_binary`. The file is memory mapped,
+        so the characters and positions are not copied
+        
+        :param file: The file name
+        :type file: string
+        :param rect: (optional) Only load the cells inside ``(x, y, width, height)``, in blueprint offsets. Only the rows of the rectangle are read
+        :type rect: tuple
+        :rtype: :class:`Blueprint`
+        
+        :Example:
+        
+        .. code-block:: python
+        
+            world = Blueprint.from_binary("world.ppb", (0, 0, 80, 24))
+            Shape(world, 0, 0, 0)
+        
+        .. seealso:: :class:`BlueprintFile`
+        """
+        return cls.from_compiled(BlueprintFile(file).compile(rect))
+    
+    def save_binary(self, file):
+        """Saves a ``custom`` blueprint in the binary format read by Blueprint.\ :func:`~pypoints.Blueprint.from_binary`
+        
+        :param file: The file name
+        :type file: string
+        
+        .. note:: The fonts used by the blueprint must be made before saving, since their colors are saved with it
+        
+        .. seealso:: :func:`convert_blueprint`
+        """
+        BlueprintFile.write(file, self.compile())
+    
+    @property
+    def data(self):
+        if self._data is None:
+            compiled = self.compiled
+            self._data = ["custom"]
+            for char, x, y, font in zip(compiled.chars, compiled.xs, compiled.ys, compiled.fonts):
+                self._data.append({"char": chr(char), "pos": {"x": x, "y": y}, "font": None if font == -1 else font})
+        return self._data
+    
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self.compiled = None
+    
+    def changed(self):
+        """Drops the cached :class:`CompiledBlueprint` after ``blueprint.data`` was edited in place,
+        so the next :func:`~pypoints.Blueprint.compile` reads the new data"""
+        if self._data is not None:
+            self.compiled = None
+    
+    def compile(self):
+        """Packs a ``custom`` blueprint into a :class:`CompiledBlueprint`. The result is cached, so every
+        :class:`Shape` made from this blueprint shares it instead of reading the json data again
+        
+        :return: The compiled blueprint
+        :rtype: :class:`CompiledBlueprint`
+        
+        .. note:: Setting ``blueprint.data`` drops the cached result. After editing ``blueprint.data`` in place,
+                  call Blueprint.\ :func:`~pypoints.Blueprint.changed` first. Shapes that were already made keep the old result
+        """
+        if self.compiled is None:
+            if self.type != "custom":
+                PYPOINTS_LOGGER.error("ERROR: Blueprint type :\"%s\" is incompatible with Shape object", self.type)
+                raise IncompatibleBlueprintType("Blueprint type :\"" + self.type + "\" is incompatible with Shape object")
+            data = self.data[1:]
+            self.compiled = CompiledBlueprint("".join(point["char"] for point in data), [point["pos"]["x"] for point in data], [point["pos"]["y"] for point in data], [-1 if point["font"] is None else point["font"] for point in data])
+        return self.compiled
+
+class CompiledBlueprint():
+    """A ``custom`` :class:`Blueprint` packed into ``array`` columns of characters, offsets and font ids.
+    Made by Blueprint.\ :func:`~pypoints.Blueprint.compile`. Its fonts are looked up once when it is compiled.
+    Every :class:`PointBuffer` stamped from it shares its columns until the buffer is changed
+    
+    :param chars: The characters
+    :type chars: string
+    :param xs: The ``x`` offset of each character
+    :type xs: iterable of int
+    :param ys: The ``y`` offset of each character
+    :type ys: iterable of int
+    :param fonts: The font regid of each character. ``-1`` is no font
+    :type fonts: iterable of int
+    
+    .. seealso:: :class:`Blueprint`, :class:`Shape`, :class:`PointBuffer`
+    """
+    def __init__(self, chars, xs, ys, fonts):
+        self.chars = array("I", map(ord, chars))
+        self.xs = array("i", xs)
+        self.ys = array("i", ys)
+        self.fonts = array("i", fonts)
+        self.lookup = None
+        self.used = [PYPOINTS_FONTREGISTRY.get(i) for i in set(self.fonts) if i != -1]
+    
+    @classmethod
+    def from_columns(cls, chars, xs, ys, fonts):
+        """Makes a compiled blueprint that uses the given columns of codepoints, offsets and font regids
+        as they are, without copying them. Used by :class:`BlueprintFile`"""
+        compiled = cls.__new__(cls)
+        compiled.chars = chars
+        compiled.xs = xs
+        compiled.ys = ys
+        compiled.fonts = fonts
+        compiled.lookup = None
+        compiled.used = [PYPOINTS_FONTREGISTRY.get(i) for i in set(fonts) if i != -1]
+        return compiled
+    
+    def __len__(self):
+        return len(self.chars)
+    
+    def stamp(self, x, y, cfield, active=True):
+        """Makes a :class:`PointBuffer` of the blueprint at ``x``, ``y`` with a single registry insert
+        
+        :rtype: :class:`PointBuffer`
+        """
+        buffer = PointBuffer(x, y, cfield, False)
+        buffer.share(self)
+        if active:
+            buffer.activate()
+        return buffer
+
+class BlueprintFile():
+    """A blueprint in the PyPoints binary format, memory mapped so opening it reads nothing but the header.
+    The cells are stored by row, so a rectangle of a large blueprint is loaded without reading the rest
+    
+    The file is little endian and every part is aligned to 4 bytes:
+    
+    - **header**: ``b"PPB1"``, the version and flags (2 bytes each), the ``x``, ``y``, width and height of the covered rectangle, the number of fonts and the number of cells (4 bytes each)
+    - **font table**: the foreground and background of each font, ``1`` if it has extra attributes or ``0`` if not, and the extra attributes (unsigned). Version 1 files store only the foreground, background and extra attributes, where ``-1`` is no extra
+    - **row index**: for each row, the number of the first cell on it, and the total number of cells at the end
+    - **cells**: the columns of codepoints, ``x`` offsets, ``y`` offsets and font table indexes (``-1`` is no font), sorted by row and ``x``
+    
+    :param file: The file name, or a bytes-like object holding the blueprint, like one from :func:`snapshot`
+    :type file: string or bytes
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        convert_blueprint("world.json", "world.ppb")
+        world = BlueprintFile("world.ppb")
+        visible = world.compile((scroll_x, scroll_y, 80, 24))
+    
+    .. seealso:: Blueprint.\ :func:`~pypoints.Blueprint.from_binary`, :func:`convert_blueprint`
+    """
+    magic = b"PPB1"
+    header = "<4sHHiiiiII"
+    version = 2
+    fontformats = {1: "<iii", 2: "<iiII"}
+    
+    def __init__(self, file):
+        import struct
+        if isinstance(file, str):
+            import mmap
+            with open(file, "rb") as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.map = file
+            file = "buffer"
+        self.view = memoryview(self.map)
+        magic, version, flags, self.x, self.y, self.width, self.height, fonts, self.count = struct.unpack_from(self.header, self.view)
+        if magic != self.magic:
+            raise IncompatibleBlueprintType("\"" + file + "\" is not a PyPoints binary blueprint")
+        if version not in self.fontformats:
+            raise IncompatibleBlueprintType("\"" + file + "\" uses binary blueprint version " + str(version) + ", which is not supported")
+        start = struct.calcsize(self.header)
+        fontformat = self.fontformats[version]
+        size = struct.calcsize(fontformat)
+        self.fonttable = []
+        for entry in struct.iter_unpack(fontformat, self.view[start:start + fonts * size]):
+            if version == 1:
+                self.fonttable.append((entry[0], entry[1], None if entry[2] == -1 else entry[2]))
+            else:
+                self.fonttable.append((entry[0], entry[1], entry[3] if entry[2] else None))
+        start += fonts * size
+        self.rows = self._column(start, self.height + 1, "I")
+        start += (self.height + 1) * 4
+        self.columns = [self._column(start + i * self.count * 4, self.count, code) for i, code in enumerate("Iiii")]
+        self.regids = None
+        log("Opened binary blueprint " + file)
+    
+    def _column(self, start, length, typecode):
+        import sys
+        view = self.view[start:start + length * 4].cast(typecode)
+        if sys.byteorder == "little":
+            return view
+        column = array(typecode, view)
+        column.byteswap()
+        return column
+    
+    def fonts(self):
+        """Returns the regid of each font in the font table, making the fonts if they do not exist yet"""
+        if self.regids is None:
+            regids = []
+            for fg, bg, extra in self.fonttable:
+                regids.append(Font(Color(fg, bg), extra).regid)
+            self.regids = regids
+        return self.regids
+    
+    def compile(self, rect=None):
+        """Returns the cells as a :class:`CompiledBlueprint`. Cells keep their offsets, so a rectangle is drawn
+        where it would be in the whole blueprint
+        
+        :param rect: (optional) Only the cells inside ``(x, y, width, height)``. Defaults to every cell, without copying them
+        :type rect: tuple
+        :rtype: :class:`CompiledBlueprint`
+        """
+        chars, xs, ys, fonts = self.columns
+        if rect is not None:
+            chars, xs, ys, fonts = self._rect(rect)
+        regids = self.fonts()
+        if any(regid != i for i, regid in enumerate(regids)):
+            table = dict(enumerate(regids))
+            table[-1] = -1
+            fonts = array("i", map(table.__getitem__, fonts))
+        return CompiledBlueprint.from_columns(chars, xs, ys, fonts)
+    
+    def _rect(self, rect):
+        from bisect import bisect_left
+        x, y, width, height = rect
+        found = [array("I"), array("i"), array("i"), array("i")]
+        xs = self.columns[1]
+        for row in range(max(y - self.y, 0), min(y + height - self.y, self.height)):
+            start = self.rows[row]
+            end = self.rows[row + 1]
+            line = xs[start:end]
+            left = start + bisect_left(line, x)
+            right = start + bisect_left(line, x + width)
+            for column, cells in zip(found, self.columns):
+                column.extend(cells[left:right])
+        return found
+    
+    @classmethod
+    def write(cls, file, compiled):
+        """Saves a :class:`CompiledBlueprint` to ``file`` in the binary format"""
+        with open(file, "wb") as f:
+            f.write(cls.pack(compiled))
+        log("Saved binary blueprint " + file)
+    
+    @classmethod
+    def pack(cls, compiled):
+        """Returns a :class:`CompiledBlueprint` in the binary format, as bytes"""
+        import struct
+        import sys
+        order = sorted(range(len(compiled)), key=lambda i: (compiled.ys[i], compiled.xs[i]))
+        count = len(order)
+        x = min(compiled.xs) if count else 0
+        y = min(compiled.ys) if count else 0
+        width = max(compiled.xs) - x + 1 if count else 0
+        height = max(compiled.ys) - y + 1 if count else 0
+        
+        table = {-1: -1}
+        fonts = []
+        for regid in compiled.fonts:
+            if regid not in table:
+                table[regid] = len(fonts)
+                font = PYPOINTS_FONTREGISTRY.get(regid)
+                fonts.append(struct.pack(cls.fontformats[cls.version], font.color.fg, font.color.bg, font.extra is not None, font.extra or 0))
+        rows = array("I", (0,)) * (height + 1)
+        for i in order:
+            rows[compiled.ys[i] - y + 1] += 1
+        for row in range(height):
+            rows[row + 1] += rows[row]
+        
+        columns = [rows]
+        columns.append(array("I", (compiled.chars[i] for i in order)))
+        columns.append(array("i", (compiled.xs[i] for i in order)))
+        columns.append(array("i", (compiled.ys[i] for i in order)))
+        columns.append(array("i", (table[compiled.fonts[i]] for i in order)))
+        data = [struct.pack(cls.header, cls.magic, cls.version, 0, x, y, width, height, len(fonts), count)]
+        data.extend(fonts)
+        for column in columns:
+            if sys.byteorder != "little":
+                column.byteswap()
+            data.append(column.tobytes())
+        return b"".join(data)
+
+def convert_blueprint(source, target):
+    """Converts a ``custom`` json blueprint file to the binary format, which loads faster and can be loaded a rectangle at a time
+    
+    :param source: The json file name
+    :type source: string
+    :param target: The binary file name
+    :type target: string
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        convert_blueprint("world.json", "world.ppb")
+    
+    .. note:: The fonts used by the blueprint must be made first, in the same order as when it was made
+    
+    .. seealso:: :class:`BlueprintFile`, Blueprint.\ :func:`~pypoints.Blueprint.from_binary`
+    """
+    Blueprint(source).save_binary(target)
+
+def snapshot(cfield=None):
+    """Saves what field ``cfield`` shows, the top character and font of every cell, as compact bytes.
+    Use :func:`restore` to show it again as one buffer, without making its texts and shapes again
+    
+    :param cfield: (optional) The field. Defaults to the current field
+    :type cfield: int
+    :return: The cells in the binary blueprint format of :class:`BlueprintFile`
+    :rtype: bytes
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        saved = snapshot(1)
+        ...
+        restore(saved, 1, clear=True)
+    
+    .. seealso:: :func:`restore`, :class:`FrameRecorder`
+    """
+    cfield = field if cfield is None else cfield
+    regids = {0: -1}
+    for font in PYPOINTS_FONTREGISTRY.list:
+        if font is not None:
+            regids.setdefault(font.value, font.regid)
+    cells = {}
+    for i in PYPOINTS_POINTREGISTRY.in_field(cfield):
+        for x, y, char, attr in i.cells():
+            cells[(x, y)] = (char, attr)
+    chars = "".join(glyph[0] for glyph in cells.values())
+    fonts = array("i", (regids.get(glyph[1], -1) for glyph in cells.values()))
+    compiled = CompiledBlueprint(chars, (cell[0] for cell in cells), (cell[1] for cell in cells), fonts)
+    return BlueprintFile.pack(compiled)
+
+def restore(data, cfield=None, clear=False):
+    """Shows cells saved with :func:`snapshot` on field ``cfield``, with a single registry insert
+    
+    :param data: The saved cells
+    :type data: bytes
+    :param cfield: (optional) The field. Defaults to the current field
+    :type cfield: int
+    :param clear: (optional) (default ``False``) Remove everything on the field first
+    :type clear: bool
+    :return: The restored cells, which can be removed with Shape.\ :func:`~pypoints.Shape.remove`
+    :rtype: :class:`Shape`
+    """
+    cfield = field if cfield is None else cfield
+    if clear:
+        PYPOINTS_POINTREGISTRY.remove_many(list(PYPOINTS_POINTREGISTRY.in_field(cfield)))
+    return Shape(Blueprint.from_compiled(BlueprintFile(data).compile()), 0, 0, cfield)
+
+class FrameRecorder():
+    """Records every frame drawn onto a window to a file, as the cells written in each frame, so it can be
+    played back later with :func:`replay`. Use it in place of the window
+    
+    :param win: The curses window or :class:`HeadlessWindow`
+    :param file: The file the frames are saved in
+    :type file: string
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        def pre(self, win):
+            self.win = FrameRecorder(win, "session.ppr")
+        def run(self, win):
+            ...
+            refresh(self.win)
+    
+    .. note:: Only what is written to ``win`` itself is recorded. With a :class:`Compositor` on a terminal, the layers draw to their own windows
+    
+    .. seealso:: :func:`replay`, :func:`snapshot`
+    """
+    magic = b"PPR2"
+    
+    def __init__(self, win, file):
+        self.win = win
+        self.file = open(file, "wb")
+        self.file.write(self.magic)
+        self.start = t.perf_counter()
+        self.ops = []
+        self.pairs = set()
+        atexit.register(self.close)
+    
+    def __getattr__(self, name):
+        return getattr(self.win, name)
+    
+    def addstr(self, y, x, text, attr=0):
+        self.win.addstr(y, x, text, attr)
+        pair = attr & curses.A_COLOR
+        if pair not in self.pairs:
+            self.pairs.add(pair)
+            for color in PYPOINTS_COLORGET.colors.values():
+                if color.value << 8 == pair:
+                    self.ops.append((2, color.value, color.fg, color.bg, b""))
+        self.ops.append((0, y, x, attr, text.encode("utf-8")))
+    
+    def erase(self):
+        self.win.erase()
+        self.ops.append((1, 0, 0, 0, b""))
+    
+    def clear(self):
+        self.erase()
+    
+    def noutrefresh(self):
+        self.win.noutrefresh()
+        self.frame()
+    
+    def refresh(self):
+        self.win.refresh()
+        self.frame()
+    
+    def frame(self):
+        """Saves the cells written since the last frame"""
+        import struct
+        if self.file is None:
+            return None
+        data = [struct.pack("<dI", t.perf_counter() - self.start, len(self.ops))]
+        for op, y, x, attr, text in self.ops:
+            if op == 2:
+                data.append(struct.pack("<Bhhh", op, y, x, attr))
+                continue
+            data.append(struct.pack("<BhhIH", op, y, x, attr, len(text)))
+            data.append(text)
+        self.file.write(b"".join(data))
+        self.ops = []
+    
+    def close(self):
+        """Stops recording and closes the file"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+def replay(file, win, speed=1.0):
+    """Plays back frames saved by :class:`FrameRecorder` onto ``win``, with the same timing
+    
+    :param file: The file the frames were saved in
+    :type file: string
+    :param win: The curses window or :class:`HeadlessWindow`
+    :param speed: (optional) (default ``1.0``) How many times faster than recorded to play. ``0`` plays every frame at once
+    :type speed: float
+    :return: The number of frames played
+    :rtype: int
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        win = HeadlessWindow(60, 200)
+        replay("session.ppr", win, 0)
+        print(win.text())
+    """
+    import struct
+    with open(file, "rb") as f:
+        data = f.read()
+    if data[:4] not in (b"PPR1", FrameRecorder.magic):
+        raise ValueError("\"" + file + "\" is not a PyPoints recording")
+    pairs = data[:4] == FrameRecorder.magic
+    at = 4
+    frames = 0
+    start = t.perf_counter()
+    while at < len(data):
+        when, count = struct.unpack_from("<dI", data, at)
+        at += 12
+        if speed:
+            wait = when / speed - (t.perf_counter() - start)
+            if wait > 0:
+                t.sleep(wait)
+        for i in range(count):
+            if pairs and data[at] == 2:
+                op, y, x, attr = struct.unpack_from("<Bhhh", data, at)
+                at += 7
+            else:
+                op, y, x, attr, length = struct.unpack_from("<BhhIH", data, at)
+                at += 11
+                text = data[at:at + length].decode("utf-8")
+                at += length
+            if op == 0:
+                try:
+                    win.addstr(y, x, text, attr)
+                except curses.error:
+                    PYPOINTS_LOGGER.debug("Cannot replay cells at %s", (x, y))
+            elif op == 1:
+                win.erase()
+            elif not headless:
+                curses.init_pair(y, x, attr)
+        win.noutrefresh()
+        if not headless:
+            curses.doupdate()
+        frames += 1
+    PYPOINTS_RENDERER.win = None
+    return frames
+
+def _text_columns(txt):
+    """Returns the characters of ``txt`` without newlines and the ``x`` and ``y`` offset of each one"""
+    chars = []
+    xs = array("i")
+    ys = array("i")
+    for num, line in enumerate(txt.split("\n")):
+        chars.append(line)
+        xs.extend(range(len(line)))
+        ys.extend(array("i", (num,)) * len(line))
+    return ("".join(chars), xs, ys)
 
 def text_to_blueprint(txt, font):
-    lines = txt.split("\n")
-    data = ["custom"]
-    for num, line in enumerate(lines):
-        for cnum, ch in enumerate(list(line)):
-            data.append({"char": ch, "pos": {"x": cnum, "y": num}, "font": font.regid})
+    """Makes a ``custom`` :class:`Blueprint` of ``txt`` in ``font``. Blueprints of recently used texts
+    are cached, so drawing the same label again reuses its blueprint
     
-#    with open(file, "w") as f:
-#        f.write(json.dumps(data))
+    :param txt: The text. ``"\\n"`` starts a new line
+    :type txt: string
+    :param font: The :class:`Font` of the text
+    :type font: :class:`Font`
+    :rtype: :class:`Blueprint`
     
-    return Blueprint(json.dumps(data), True)
+    .. note:: The blueprint is shared, so do not change its ``data``
+    """
+    key = (txt, font)
+    blueprint = PYPOINTS_TEXTCACHE.get(key)
+    if blueprint is not None:
+        PYPOINTS_TEXTCACHE.move_to_end(key)
+        return blueprint
+    
+    chars, xs, ys = _text_columns(txt)
+    blueprint = Blueprint.from_compiled(CompiledBlueprint(chars, xs, ys, array("i", (font.regid,)) * len(chars)))
+    
+    PYPOINTS_TEXTCACHE[key] = blueprint
+    if len(PYPOINTS_TEXTCACHE) > text_cache_size:
+        PYPOINTS_TEXTCACHE.popitem(False)
+    return blueprint
 
 class Shape():
     def __init__(self, blueprint, x, y, field, active=True):
@@ -497,22 +3284,34 @@ class Shape():
         self.x = x
         self.y = y
         self.field = field
-        self.points = []
+        self.points = None
         self.active = active
         
         self.draw()
         log("Created shape")
     
     def draw(self):
-        if self.blueprint.type != "custom":
-            log("ERROR: Blueprint type :\"" + self.blueprint.type + "\" is incompatible with Shape object")
-            raise IncompatibleBlueprintType("Blueprint type :\"" + self.blueprint.type + "\" is incompatible with Shape object")
-            
-        for idex, point in enumerate(self.blueprint.data):
-            if idex == 0:
-                pass
-            else:
-                self.points.append(Point(point["char"], point["pos"]["x"] + self.x, point["pos"]["y"] + self.y, self.field, PYPOINTS_FONTREGISTRY.get(point["font"]), self.active))
+        self.points = self.blueprint.compile().stamp(self.x, self.y, self.field, self.active)
+    
+    def move(self, dx, dy):
+        """Moves the shape by ``dx`` columns and ``dy`` rows without rebuilding its points
+        
+        :Example:
+        
+        .. code-block:: python
+        
+            shape = Shape(blueprint, 0, 0, 0)
+            shape.move(1, 0)
+        """
+        self.x += dx
+        self.y += dy
+        self.points.move(dx, dy)
+    
+    def remove(self, kill=False):
+        """Removes all points in the shape"""
+        self.points.remove()
+        if kill:
+            del(self)
 
 class Text():
     def __init__(self, x, y, text, cfield, font, blueprint=None):
@@ -534,13 +3333,47 @@ class Text():
             self.to_hide = False
             return None
         if self.blueprint is None:
-            log(self.text, True)
+            PYPOINTS_LOGGER.debug("%s", self.text)
             self.shape = Shape(text_to_blueprint(self.text, self.font), self.x, self.y, self.field)
     
+    def set_text(self, text):
+        """Changes the text in place. Only the characters that changed are redrawn, and points are
+        only added or removed at the end, so changing a status line several times a second is cheap
+        
+        :param text: The new text
+        :type text: string
+        
+        :Example:
+        
+        .. code-block:: python
+        
+            status = Text(0, 0, "Loading", 0, font)
+            status.set_text("Ready")
+        
+        .. seealso:: Text.\ :func:`~pypoints.Text.update`
+        """
+        self.text = text
+        self.update()
+    
+    def update(self):
+        """Redraws the text after ``text.text`` or ``text.font`` was changed, the same way as Text.\ :func:`~pypoints.Text.set_text`"""
+        shape = getattr(self, "shape", None)
+        if shape is None or self.blueprint is not None:
+            return None
+        chars, xs, ys = _text_columns(self.text)
+        shape.points.update(chars, xs, ys, self.font)
+    
+    def move(self, dx, dy):
+        """Moves the text by ``dx`` columns and ``dy`` rows. Its points are moved, not rebuilt"""
+        self.x += dx
+        self.y += dy
+        shape = getattr(self, "shape", None)
+        if shape is not None:
+            shape.move(dx, dy)
+    
     def remove(self, kill=False):
         log("Removed text")
-        for i in self.shape.points:
-            i.remove(kill)
+        self.shape.remove()
         if kill:
             del(self)
     
@@ -548,8 +3381,7 @@ class Text():
         if not self.drawn:
             self.to_hide = True
         else:
-            for i in self.shape.points:
-                i.remove(True)
+            self.shape.remove()
             
             del(self.shape)
     
@@ -602,7 +3434,16 @@ class MenuBox():
                 top = top + "─"
         
             self.box = "┌" + top + "┐" + "\n" + box + "\n" + "└" + top + "┘"
-            log(self.box, True)
+            PYPOINTS_LOGGER.debug("%s", self.box)
+    
+    def move(self, dx, dy):
+        """Moves the menu by ``dx`` columns and ``dy`` rows, also while it is open"""
+        self.x += dx
+        self.y += dy
+        if self.shape is not None:
+            self.shape.move(dx, dy)
+        if self.cursor is not None and self.cursor.activated:
+            self.cursor.move(dx, dy)
     
     def capture(self, win):
         menu_y = 0
@@ -614,42 +3455,280 @@ class MenuBox():
         
         #prev_pos = (self.cursor.x, self.cursor.y)
         
-        key = ""
-        while key != "\n":
-            key = win.getkey()
-            log("MenuBox key pressed: " + key, True)
-            
-            if key == "KEY_UP":
-                menu_y -= 1
-            elif key == "KEY_DOWN":
-                menu_y += 1
-            
-            if menu_y == -1:
-                menu_y = len(self.opts) - 1
-            elif menu_y == len(self.opts):
-                menu_y = 0
+        done = False
+        while not done:
+            batch = keys(win)
+            for num, key in enumerate(batch):
+                PYPOINTS_LOGGER.debug("MenuBox key pressed: %s", key)
+                if key == "\n":
+                    PYPOINTS_INPUT.unread(batch[num + 1:])
+                    done = True
+                    break
+                elif key == "KEY_UP":
+                    menu_y -= 1
+                elif key == "KEY_DOWN":
+                    menu_y += 1
+                menu_y %= len(self.opts)
             
             self.cursor.y = menu_y + 1 + self.y
-            refresh(win)
+            request_refresh(win)
         
         self.cursor.remove(True)
+        flush(win)
         return self.opts[menu_y]
         
 class Group():
-    def __init__(self):
+    """Keeps points, shapes, texts and lines together so they are moved as one, like the parts of a window.
+    Children are placed relative to the origin of the group, and moving the group moves every child
+    without rebuilding any points
+    
+    :param x: (optional) (default ``0``) The ``x`` position of the origin
+    :type x: int
+    :param y: (optional) (default ``0``) The ``y`` position of the origin
+    :type y: int
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        window = Group(10, 5)
+        window.add("frame", Box(0, 0, 30, 8, 0))
+        window.add("title", Text(2, 0, " Settings ", 0, font))
+        window.move(1, 0)
+        window["title"].set_text(" Saved ")
+    
+    .. note:: Any child with a ``move(dx, dy)`` and ``remove()`` method can be added
+    
+    .. seealso:: :class:`Shape`, :class:`Text`, :class:`Point`
+    """
+    def __init__(self, x=0, y=0):
+        self.x = x
+        self.y = y
         self.points = {}
         self.shapes = {}
         self.texts = {}
+    
+    def _children(self, child):
+        if isinstance(child, Point):
+            return self.points
+        if isinstance(child, Text):
+            return self.texts
+        return self.shapes
+    
+    def add(self, name, child):
+        """Adds ``child``, made at a position relative to the group, and moves it into place
+        
+        :param name: The name the child is found with
+        :type name: string
+        :param child: The child, like a :class:`Point`, :class:`Shape`, :class:`Text`, :class:`Line` or :class:`Box`
+        :return: The child
+        """
+        self._children(child)[name] = child
+        child.move(self.x, self.y)
+        return child
+    
+    def __getitem__(self, name):
+        for children in (self.points, self.shapes, self.texts):
+            if name in children:
+                return children[name]
+        raise KeyError(name)
+    
+    def __iter__(self):
+        for children in (self.points, self.shapes, self.texts):
+            yield from children.values()
+    
+    def pop(self, name):
+        """Takes the child ``name`` out of the group and returns it. It stays on the screen where it is"""
+        child = self[name]
+        del self._children(child)[name]
+        return child
+    
+    def move(self, dx, dy):
+        """Moves the group and every child by ``dx`` columns and ``dy`` rows"""
+        self.x += dx
+        self.y += dy
+        for child in self:
+            child.move(dx, dy)
+    
+    def move_to(self, x, y):
+        """Moves the origin of the group to ``x``, ``y``"""
+        self.move(x - self.x, y - self.y)
+    
+    def remove(self, kill=False):
+        """Removes every child of the group
+        
+        :param kill: (optional) (default ``False``) Deletes the group
+        :type kill: bool
+        """
+        for child in self:
+            child.remove()
+        if kill:
+            del(self)
 
-def refresh(win):
-    win.clear()
-    try:
-        for i in PYPOINTS_POINTREGISTRY.runlist:
-            if i.field == field:
-                i.draw(win)
-    except Exception as e:
-        log(e)
-    win.refresh()
+def refresh(win, full=False):
+    """Draws the current field onto ``win``. Only the cells that changed since the last call are written
+    
+    :param win: The curses window
+    :param full: (optional) (default ``False``) Clear the window and redraw every point
+    :type full: bool
+    
+    .. seealso:: :class:`Renderer`, :func:`request_refresh`
+    """
+    PYPOINTS_SCHEDULER.flush(win, full)
+
+def request_refresh(win):
+    """Asks for the current field to be drawn onto ``win``. Requests that come in faster than the frame rate
+    set with :func:`set_fps` are merged into one frame. A waiting frame is drawn by :func:`getkey` before it
+    blocks, by :func:`flush`, or by the next request after the frame interval
+    
+    :param win: The curses window
+    
+    .. seealso:: :func:`refresh`, :func:`flush`, :class:`FrameScheduler`
+    """
+    PYPOINTS_SCHEDULER.request(win)
+
+def flush(win=None):
+    """Draws the frame waiting from :func:`request_refresh` right now
+    
+    :param win: (optional) The curses window. Defaults to the window of the last request
+    """
+    PYPOINTS_SCHEDULER.flush(win)
+
+def set_fps(fps):
+    """Sets the highest number of frames per second drawn by :func:`request_refresh`. ``0`` draws every request
+    
+    :param fps: Frames per second
+    :type fps: int
+    """
+    PYPOINTS_SCHEDULER.interval = 1 / fps if fps else 0
+
+def getkey(win):
+    """Waits for a key like ``win.getkey()``. All waiting keys are read at once and queued, and if a frame from
+    :func:`request_refresh` is waiting and no key is ready, the frame is drawn before waiting, so keys that come in
+    quickly are handled without drawing between them
+    
+    :param win: The curses window
+    :return: The key, or a :class:`Paste` of pasted text
+    :rtype: string
+    :raises curses.error: If a timeout was set with :func:`set_timeout` and no key came in time, like ``win.getkey()``
+    
+    .. seealso:: :func:`keys`
+    """
+    queue = PYPOINTS_INPUT
+    if not queue.events:
+        queue.poll(win)
+    while not queue.events:
+        if PYPOINTS_SCHEDULER.pending:
+            PYPOINTS_SCHEDULER.flush(win)
+        queue.wait(win)
+        if queue.delay >= 0 and not queue.events:
+            raise curses.error("no input")
+    key = queue.events.popleft()
+    if key == "KEY_RESIZE":
+        resize(win)
+    return key
+
+def keys(win, wait=True):
+    """Returns every key that is waiting, read all at once. Handling a whole batch and then drawing once
+    keeps up with fast typing and pastes
+    
+    :param win: The curses window
+    :param wait: (optional) (default ``True``) If no key is waiting, draw the waiting frame and wait for one, or only until the timeout
+                 set with :func:`set_timeout`. ``False`` returns an empty list instead
+    :type wait: bool
+    :return: The keys, with each paste as one :class:`Paste`
+    :rtype: list of string
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        for key in keys(win):
+            if isinstance(key, Paste):
+                text += key
+            elif len(key) == 1:
+                text += key
+        label.set_text(text)
+        request_refresh(win)
+    
+    .. seealso:: :func:`getkey`, :func:`set_paste`
+    """
+    queue = PYPOINTS_INPUT
+    queue.poll(win)
+    while wait and not queue.events:
+        if PYPOINTS_SCHEDULER.pending:
+            PYPOINTS_SCHEDULER.flush(win)
+        queue.wait(win)
+        if queue.delay >= 0:
+            break
+    events = queue.take()
+    if "KEY_RESIZE" in events:
+        resize(win)
+    return events
+
+def set_paste(on=True):
+    """Turns bracketed paste on or off in the terminal. When it is on, a paste is read as one :class:`Paste` instead of one key per character
+    
+    :param on: (optional) (default ``True``) ``False`` turns it off
+    :type on: bool
+    """
+    if headless:
+        return None
+    import sys
+    sys.stdout.write("\x1b[?2004h" if on else "\x1b[?2004l")
+    sys.stdout.flush()
+    if on:
+        atexit.register(set_paste, False)
+
+def set_timeout(win, delay):
+    """Sets how long ``win`` waits for a key, like ``win.timeout(delay)``. Use this instead of ``win.timeout()``,
+    because reading keys with :func:`getkey` and :func:`keys` turns no-delay mode on and off, and then puts this timeout back.
+    When the timeout runs out, :func:`getkey` raises ``curses.error`` and :func:`keys` returns an empty list
+    
+    :param win: The curses window
+    :param delay: Milliseconds to wait. ``-1`` waits forever and ``0`` does not wait
+    :type delay: int
+    """
+    PYPOINTS_INPUT.delay = delay
+    win.timeout(delay)
+
+def resize(win):
+    """Handles a change of the terminal size. The next frame is drawn for the new size, points past the edges are skipped,
+    and objects anchored with :func:`anchor` are moved. :func:`getkey` calls this when it reads ``"KEY_RESIZE"``
+    
+    :param win: The curses window
+    
+    .. seealso:: :func:`anchor`
+    """
+    if not headless:
+        curses.update_lines_cols()
+    PYPOINTS_LAYOUT.check(win)
+    request_refresh(win)
+
+def anchor(item, right=False, bottom=False):
+    """Keeps ``item`` at the same distance from the right and/or bottom edge of the window when the terminal is resized.
+    The item is moved with its ``move(dx, dy)`` method, so nothing is rebuilt
+    
+    :param item: A :class:`Text`, :class:`MenuBox`, :class:`Shape`, :class:`Group` or anything else with a ``move(dx, dy)`` method
+    :param right: (optional) (default ``False``) Keep the distance to the right edge
+    :type right: bool
+    :param bottom: (optional) (default ``False``) Keep the distance to the bottom edge
+    :type bottom: bool
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        status = Text(0, curses.LINES - 1, "Ready", 0, font)
+        anchor(status, bottom=True)
+    
+    .. seealso:: :func:`unanchor`, :func:`resize`
+    """
+    PYPOINTS_LAYOUT.anchors.append((item, right, bottom))
+
+def unanchor(item):
+    """Stops moving ``item`` when the terminal is resized"""
+    PYPOINTS_LAYOUT.anchors = [i for i in PYPOINTS_LAYOUT.anchors if i[0] is not item]
 
 def cursor(x, y, win):
     try:
@@ -663,10 +3742,10 @@ def capture_cursor(win, sx=0, sy=0, endkey="\n", onekey=False):
     
     cursor(x, y, win)
     
-    if onekey:
-        while True:
-            key = win.getkey()
-            log(key, True)
+    while True:
+        batch = keys(win)
+        for num, key in enumerate(batch):
+            PYPOINTS_LOGGER.debug("%s", key)
             if key == "KEY_LEFT":
                 x -= 1
             elif key == "KEY_RIGHT":
@@ -675,36 +3754,21 @@ def capture_cursor(win, sx=0, sy=0, endkey="\n", onekey=False):
                 y -= 1
             elif key == "KEY_DOWN":
                 y += 1
-            else:
+            elif onekey or key == endkey:
+                PYPOINTS_INPUT.unread(batch[num + 1:])
+                if not onekey:
+                    return (x, y)
+                cursor(x, y, win)
                 return (key, x, y)
             
-            if x == -1:
-                x = 0
-            if x == curses.COLS:
-                x = curses.COLS - 1
-            if y == -1:
-                y = 0
-            if y == curses.LINES:
-                y = curses.LINES - 1
-            
-            log("Moving cursor to " + str(x) + ", " + str(y))
+            if onekey:
+                lines, cols = win.getmaxyx()
+                x = min(max(x, 0), cols - 1)
+                y = min(max(y, 0), lines - 1)
+        
+        if onekey:
+            PYPOINTS_LOGGER.info("Moving cursor to %d, %d", x, y)
             cursor(x, y, win)
-            t.sleep(.03)
-    
-    else:
-        while key != endkey:
-            key = win.getkey()
-            log(key, True)
-            if key == "KEY_LEFT":
-                x -= 1
-            elif key == "KEY_RIGHT":
-                x += 1
-            elif key == "KEY_UP":
-                y -= 1
-            elif key == "KEY_DOWN":
-                y += 1
-            t.sleep(.03)
-        return (x, y)
 
 class SingleLineTextBox():
     def __init__(self, x, y, cfield, font, prompt="", onlynumbers=False):
@@ -722,31 +3786,306 @@ class SingleLineTextBox():
         self.text = Text(self.x + len(self.prompt), self.y, text, self.field, self.font)
         refresh(win)
         while key != "\n":
-            key = win.getkey()
-            if key == "" or key == "KEY_BACKSPACE":
-                try:
+            batch = keys(win)
+            for num, key in enumerate(batch):
+                if key == "\n":
+                    PYPOINTS_INPUT.unread(batch[num + 1:])
+                    break
+                if key == "" or key == "KEY_BACKSPACE":
                     text = text[:-1]
-                except Exception:
-                    pass
-            else:
-                if self.numbers:
-                    try:
-                        int(key)
-                    except Exception:
-                        log("Typed " + key + ". Must use numbers")
-                        continue
-                elif len(key) > 1:
-                    continue
-                text = text + key
-                
-            self.text.remove(True)
-            self.text = Text(self.x + len(self.prompt), self.y, text, self.field, self.font)
-            refresh(win)
-            #log(text)
+                elif isinstance(key, Paste):
+                    text = text + "".join(i for i in key if self.accepts(i))
+                elif len(key) == 1 and self.accepts(key):
+                    text = text + key
+            
+            self.text.set_text(text)
+            request_refresh(win)
         
         self.text.remove(True)
+        flush(win)
         log(text, True)
+        return text
+    
+    def accepts(self, key):
+        """Returns ``True`` if the typed character ``key`` can be added to the text"""
+        if key in "\r\n":
+            return False
         if self.numbers:
-            return text
+            try:
+                int(key)
+            except Exception:
+                log("Typed " + key + ". Must use numbers")
+                return False
+        return True
+
+class TextView():
+    """The base of :class:`LogView` and :class:`TextArea`. The lines are kept in a ``deque`` with a maximum length,
+    and only the visible lines are drawn, on a :class:`Canvas`. Changes are drawn once per frame, and only the rows that changed are redrawn
+    
+    .. warning:: Do not use this class. It is an internal usage class only
+    """
+    def __init__(self, x, y, width, height, cfield, font, max_lines):
+        self.lines = deque(maxlen=max_lines)
+        self.top = 0
+        self.left = 0
+        self.width = width
+        self.height = height
+        self.font = font
+        self.canvas = Canvas(x, y, width, height, cfield, font)
+        self.changed()
+    
+    @property
+    def x(self):
+        return self.canvas.x
+    
+    @property
+    def y(self):
+        return self.canvas.y
+    
+    @property
+    def field(self):
+        return self.canvas.field
+    
+    def changed(self):
+        """Redraws the visible lines before the next frame"""
+        PYPOINTS_POINTREGISTRY.defer(self)
+    
+    def scroll(self, dy):
+        """Scrolls the view by ``dy`` lines. Negative values scroll up"""
+        self.scroll_to(self.top + dy)
+    
+    def scroll_to(self, line):
+        """Scrolls the view so ``line`` is the top visible line"""
+        self.top = min(max(line, 0), max(len(self.lines) - self.height, 0))
+        self.changed()
+    
+    def visible(self):
+        """Returns the visible lines, cut to the width of the view"""
+        lines = self.lines
+        end = min(self.top + self.height, len(lines))
+        left = self.left
+        right = left + self.width
+        return [lines[i][left:right] for i in range(self.top, end)]
+    
+    def sync(self):
+        """Draws the visible lines. Called by the :class:`Renderer` before a frame"""
+        rows = [line.ljust(self.width) for line in self.visible()]
+        rows.extend([" " * self.width] * (self.height - len(rows)))
+        self.canvas.blit(rows, font=self.font)
+    
+    def move(self, dx, dy):
+        """Moves the view by ``dx`` columns and ``dy`` rows"""
+        self.canvas.move(dx, dy)
+    
+    def remove(self, kill=False):
+        """Removes the view
+        
+        :param kill: (optional) (default ``False``) Deletes the view
+        :type kill: bool
+        """
+        if self in PYPOINTS_POINTREGISTRY.deferred:
+            PYPOINTS_POINTREGISTRY.deferred.remove(self)
+        self.canvas.remove()
+        if kill:
+            del(self)
+
+class LogView(TextView):
+    """A scrolling log. New lines are added at the bottom, and the oldest lines are dropped once there are ``max_lines``,
+    so memory stays the same however much is logged. Lines appended between two frames are drawn once
+    
+    :param x: The ``x`` position of the view
+    :type x: int
+    :param y: The ``y`` position of the view
+    :type y: int
+    :param width: The width of the view
+    :type width: int
+    :param height: The number of visible lines
+    :type height: int
+    :param cfield: The field the view appears
+    :type cfield: int
+    :param font: The :class:`Font` of the lines
+    :type font: :class:`Font`
+    :param max_lines: (optional) (default ``1000``) The number of lines kept
+    :type max_lines: int
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        view = LogView(0, 1, 80, 20, 0, font)
+        for line in service.lines():
+            view.append(line)
+            request_refresh(win)
+    
+    .. note:: The view follows new lines while it is scrolled to the bottom. Scrolling up keeps it in place until it is scrolled back down
+    
+    .. seealso:: :class:`TextArea`
+    """
+    def __init__(self, x, y, width, height, cfield, font, max_lines=1000):
+        TextView.__init__(self, x, y, width, height, cfield, font, max_lines)
+        self.follow = True
+    
+    def append(self, line):
+        """Adds ``line`` at the bottom. A line with newlines is added as several lines"""
+        self.extend(str(line).split("\n"))
+    
+    def extend(self, lines):
+        """Adds every line in ``lines`` at the bottom"""
+        lines = list(lines)
+        dropped = max(len(self.lines) + len(lines) - self.lines.maxlen, 0)
+        self.lines.extend(lines)
+        if not self.follow:
+            self.top = max(self.top - dropped, 0)
+        self.changed()
+    
+    def clear(self):
+        """Removes every line"""
+        self.lines.clear()
+        self.top = 0
+        self.follow = True
+        self.changed()
+    
+    def scroll_to(self, line):
+        TextView.scroll_to(self, line)
+        self.follow = self.top >= len(self.lines) - self.height
+    
+    def sync(self):
+        if self.follow:
+            self.top = max(len(self.lines) - self.height, 0)
+        TextView.sync(self)
+
+class TextArea(TextView):
+    """A multiline text box. Use TextArea.\ :func:`~pypoints.TextArea.capture` to let the user type in it. Only the visible lines are drawn,
+    and typing only redraws the lines that changed
+    
+    :param x: The ``x`` position of the box
+    :type x: int
+    :param y: The ``y`` position of the box
+    :type y: int
+    :param width: The width of the box
+    :type width: int
+    :param height: The number of visible lines
+    :type height: int
+    :param cfield: The field the box appears
+    :type cfield: int
+    :param font: The :class:`Font` of the text
+    :type font: :class:`Font`
+    :param text: (optional) (default ``""``) The starting text
+    :type text: string
+    :param max_lines: (optional) (default ``1000``) The most lines kept. Once there are more, the first lines are dropped
+    :type max_lines: int
+    
+    :Example:
+    
+    .. code-block:: python
+    
+        area = TextArea(2, 2, 60, 10, 0, font)
+        notes = area.capture(win)
+    
+    .. seealso:: :class:`SingleLineTextBox`, :class:`LogView`
+    """
+    def __init__(self, x, y, width, height, cfield, font, text="", max_lines=1000):
+        TextView.__init__(self, x, y, width, height, cfield, font, max_lines)
+        self.cursor_font = Font(font.color, (font.extra or 0) | reverse)
+        self.showing = False
+        self.set_text(text)
+    
+    @property
+    def text(self):
+        return "\n".join(self.lines)
+    
+    def set_text(self, text):
+        """Replaces the text and puts the cursor at its end"""
+        self.lines = deque(text.split("\n"), maxlen=self.lines.maxlen)
+        self.row = len(self.lines) - 1
+        self.col = len(self.lines[-1])
+        self.changed()
+    
+    def insert(self, text):
+        """Types ``text`` at the cursor. ``"\\n"`` starts a new line"""
+        parts = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        line = self.lines[self.row]
+        end = line[self.col:]
+        self.lines[self.row] = line[:self.col] + parts[0]
+        for part in parts[1:]:
+            if len(self.lines) == self.lines.maxlen:
+                self.lines.popleft()
+                self.row -= 1
+            self.row += 1
+            self.lines.insert(self.row, part)
+        self.col = len(self.lines[self.row])
+        self.lines[self.row] += end
+        self.changed()
+    
+    def backspace(self):
+        """Deletes the character before the cursor, joining lines at the start of a line"""
+        if self.col > 0:
+            line = self.lines[self.row]
+            self.lines[self.row] = line[:self.col - 1] + line[self.col:]
+            self.col -= 1
+        elif self.row > 0:
+            line = self.lines[self.row]
+            del self.lines[self.row]
+            self.row -= 1
+            self.col = len(self.lines[self.row])
+            self.lines[self.row] += line
+        self.changed()
+    
+    def key(self, key):
+        """Handles one key or :class:`Paste` from :func:`keys`"""
+        if isinstance(key, Paste) or key == "\n" or (len(key) == 1 and key.isprintable()):
+            self.insert(key)
+        elif key == "\x7f" or key == "KEY_BACKSPACE":
+            self.backspace()
+        elif key == "KEY_LEFT" and self.col > 0:
+            self.col -= 1
+        elif key == "KEY_RIGHT" and self.col < len(self.lines[self.row]):
+            self.col += 1
+        elif key == "KEY_UP" and self.row > 0:
+            self.row -= 1
+        elif key == "KEY_DOWN" and self.row < len(self.lines) - 1:
+            self.row += 1
+        elif key == "KEY_HOME":
+            self.col = 0
+        elif key == "KEY_END":
+            self.col = len(self.lines[self.row])
         else:
-            return text[:-1]
+            return None
+        self.col = min(self.col, len(self.lines[self.row]))
+        self.changed()
+    
+    def sync(self):
+        self.top = min(max(self.top, self.row - self.height + 1), self.row)
+        self.left = min(max(self.left, self.col - self.width + 1), self.col)
+        TextView.sync(self)
+        if self.showing:
+            line = self.lines[self.row]
+            self.canvas.set(self.col - self.left, self.row - self.top, line[self.col] if self.col < len(line) else " ", self.cursor_font)
+    
+    def capture(self, win, endkey="\x1b"):
+        """Lets the user type in the box until ``endkey`` is pressed. Keys are handled in batches, and the box is drawn once per batch
+        
+        :param win: The curses window
+        :param endkey: (optional) (default ``"\\x1b"``, Escape) The key that ends typing
+        :type endkey: string
+        :return: The text
+        :rtype: string
+        """
+        self.showing = True
+        self.changed()
+        refresh(win)
+        done = False
+        while not done:
+            batch = keys(win)
+            for num, key in enumerate(batch):
+                if key == endkey:
+                    PYPOINTS_INPUT.unread(batch[num + 1:])
+                    done = True
+                    break
+                self.key(key)
+            request_refresh(win)
+        self.showing = False
+        self.changed()
+        flush(win)
+        log("TextArea captured " + str(len(self.lines)) + " lines")
+        return self.text